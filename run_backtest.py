@@ -10,8 +10,8 @@ from datetime import datetime
 import pandas as pd
 
 from trader.config import load_config
-from trader.data.feed import fetch_ohlcv
-from trader.core.backtest import run_backtest
+from trader.data.store import load_market_data
+from trader.core.backtest import ENGINES, run_backtest
 from trader.core.metrics import compute_metrics
 from trader.logging_conf import setup_logging
 from trader.strategies.sma_cross import SMACross
@@ -31,6 +31,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--timeout-ms", type=int)
     parser.add_argument("--proxies-http")
     parser.add_argument("--proxies-https")
+    parser.add_argument("--engine", choices=ENGINES)
     return parser.parse_args()
 
 
@@ -53,6 +54,8 @@ def main() -> None:
         cfg.proxies.http = args.proxies_http
     if args.proxies_https:
         cfg.proxies.https = args.proxies_https
+    if args.engine:
+        cfg.backtest.engine = args.engine
 
     proxies = cfg.proxies.dict(exclude_none=True)
     logger.info(
@@ -65,20 +68,7 @@ def main() -> None:
     )
     strategy_cls = STRATS[cfg.strategy.name]
     strategy = strategy_cls(**cfg.strategy.params)
-    data = {
-        s: fetch_ohlcv(
-            cfg.exchange,
-            s,
-            cfg.timeframe,
-            cfg.data.lookback_limit,
-            timeout_ms=cfg.network.timeout_ms,
-            max_retries=cfg.network.max_retries,
-            backoff_base_ms=cfg.network.backoff_base_ms,
-            user_agent=cfg.network.user_agent,
-            proxies=proxies,
-        )
-        for s in cfg.symbols
-    }
+    data = load_market_data(cfg)
     equity_df, trades_df = run_backtest(data, strategy, cfg)
     metrics = compute_metrics(equity_df["equity"], trades_df, cfg.timeframe)
     print(metrics)
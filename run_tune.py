@@ -8,7 +8,7 @@ from datetime import datetime
 from pathlib import Path
 
 from trader.config import load_config
-from trader.data.feed import fetch_ohlcv
+from trader.data.store import load_market_data
 from trader.learn.tuner import tune
 from trader.logging_conf import setup_logging
 from trader.storage.db import get_session
@@ -24,6 +24,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--timeout-ms", type=int)
     parser.add_argument("--proxies-http")
     parser.add_argument("--proxies-https")
+    parser.add_argument("--mode", choices=["optuna", "grid"])
     return parser.parse_args()
 
 
@@ -46,6 +47,8 @@ def main() -> None:
         cfg.proxies.http = args.proxies_http
     if args.proxies_https:
         cfg.proxies.https = args.proxies_https
+    if args.mode:
+        cfg.tuning.mode = args.mode
 
     proxies = cfg.proxies.dict(exclude_none=True)
     logger.info(
@@ -56,20 +59,7 @@ def main() -> None:
         cfg.network.timeout_ms,
         proxies,
     )
-    data = {
-        s: fetch_ohlcv(
-            cfg.exchange,
-            s,
-            cfg.timeframe,
-            cfg.data.lookback_limit,
-            timeout_ms=cfg.network.timeout_ms,
-            max_retries=cfg.network.max_retries,
-            backoff_base_ms=cfg.network.backoff_base_ms,
-            user_agent=cfg.network.user_agent,
-            proxies=proxies,
-        )
-        for s in cfg.symbols
-    }
+    data = load_market_data(cfg)
     best = tune(data, cfg.strategy.name, cfg)
     print("Best params", best)
     runs_dir = Path("runs")
@@ -8,7 +8,7 @@ from datetime import datetime
 from pathlib import Path
 
 from trader.config import load_config
-from trader.data.feed import fetch_ohlcv
+from trader.data.store import load_market_data
 from trader.learn.walkforward import walk_forward
 from trader.logging_conf import setup_logging
 from trader.storage.db import get_session
@@ -56,20 +56,7 @@ def main() -> None:
         cfg.network.timeout_ms,
         proxies,
     )
-    data = {
-        s: fetch_ohlcv(
-            cfg.exchange,
-            s,
-            cfg.timeframe,
-            cfg.data.lookback_limit,
-            timeout_ms=cfg.network.timeout_ms,
-            max_retries=cfg.network.max_retries,
-            backoff_base_ms=cfg.network.backoff_base_ms,
-            user_agent=cfg.network.user_agent,
-            proxies=proxies,
-        )
-        for s in cfg.symbols
-    }
+    data = load_market_data(cfg)
     equity, params = walk_forward(data, cfg.strategy.name, cfg)
     print("Suggested params", params)
     Path("config.last_params.json").write_text(json.dumps(params))
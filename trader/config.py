@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 import os
 
@@ -30,22 +30,67 @@ class StrategyConfig(BaseModel):
 class DataConfig(BaseModel):
     lookback_limit: int
     cache_minutes: int = 0
+    cache_dir: str = "data_cache"
+    page_limit: int = Field(1000, ge=1)
+    fetch_workers: int = Field(4, ge=1)
+
+
+class BacktestConfig(BaseModel):
+    engine: Literal["loop", "vectorized"] = "loop"
 
 
 class TuningConfig(BaseModel):
     n_trials: int = 50
     direction: str = "maximize"
+    mode: Literal["optuna", "grid"] = "optuna"
+    batch_size: int = Field(1, ge=1)
+    chunk_size: int = Field(256, ge=1)
+    n_jobs: int = Field(1, ge=1)
+    backend: Literal["thread", "process"] = "process"
+    storage: Optional[str] = None
+    warm_start_top_k: int = Field(5, ge=0)
+    pruner: Literal["none", "median", "halving", "hyperband"] = "none"
+    report_steps: int = Field(10, ge=1)
+    memo: bool = True
+
+
+class WalkForwardConfig(BaseModel):
+    train_days: int = Field(180, ge=1)
+    test_days: int = Field(30, ge=1)
+    step_days: Optional[int] = Field(None, ge=1)
+    mode: Literal["rolling", "anchored"] = "rolling"
+    checkpoint: bool = True
+    n_jobs: int = Field(1, ge=1)
+    max_retries: int = Field(2, ge=0)
 
 
 class ScheduleConfig(BaseModel):
     retrain_hour_utc: int = Field(ge=0, le=23)
 
 
+class AccountConfig(BaseModel):
+    name: str
+    strategy: str
+    params: Dict[str, Any] = {}
+    starting_balance_eur: Optional[float] = None
+
+
+class LiveConfig(BaseModel):
+    settle_seconds: float = Field(2.0, ge=0)
+    retry_seconds: float = Field(2.0, gt=0)
+    max_wait_seconds: float = Field(120.0, gt=0)
+    risk_check_seconds: float = Field(300.0, gt=0)
+    write_batch_size: int = Field(500, ge=1)
+    write_flush_seconds: float = Field(1.0, gt=0)
+    accounts: List[AccountConfig] = []
+
+
 class NetworkConfig(BaseModel):
     timeout_ms: int = 20000
     max_retries: int = 5
     backoff_base_ms: int = 500
     user_agent: str = "TraderBot/1.0"
+    max_concurrency: int = Field(8, ge=1)
 
 
 class ProxiesConfig(BaseModel):
@@ -61,8 +106,11 @@ class Config(BaseModel):
     risk: RiskConfig
     strategy: StrategyConfig
     data: DataConfig
+    backtest: BacktestConfig = BacktestConfig()
     tuning: TuningConfig
+    walkforward: WalkForwardConfig = WalkForwardConfig()
     schedule: ScheduleConfig
+    live: LiveConfig = LiveConfig()
     network: NetworkConfig = NetworkConfig()
     proxies: ProxiesConfig = ProxiesConfig()
 
@@ -1,20 +1,39 @@
 """Backtesting utilities."""
 from __future__ import annotations
 
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 
-from .broker import PaperBroker
+from .broker import TRADE_COLUMNS, PaperBroker
 from .portfolio import equal_weight_targets
+from ..data.panel import MarketPanel, as_panel
+from ..storage.models import TradeSide
+from ..utils import apply_slippage
+
+ENGINES = ("loop", "vectorized")
 
 
 def run_backtest(
-    df_by_symbol: Dict[str, pd.DataFrame],
+    df_by_symbol: Dict[str, pd.DataFrame] | MarketPanel,
     strategy,
     cfg,
+    engine: str | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Run backtest and return equity and trades DataFrames."""
+    """Run backtest and return equity and trades DataFrames.
+
+    ``engine`` selects the implementation and defaults to ``cfg.backtest.engine``.
+    """
+    engine = engine or cfg.backtest.engine
+    if engine == "vectorized":
+        return run_backtest_vectorized(df_by_symbol, strategy, cfg)
+    if engine != "loop":
+        raise ValueError(f"Unknown backtest engine: {engine}")
+    if isinstance(df_by_symbol, MarketPanel):
+        df_by_symbol = df_by_symbol.to_frames()
+
     broker = PaperBroker(
         starting_eur=cfg.paper.starting_balance_eur,
         fee_bps=cfg.paper.fee_bps,
@@ -37,13 +56,249 @@ def run_backtest(
             current_signals[sym] = sig
             if prev_sig[sym] == 0 and sig == 1:
                 targets = equal_weight_targets(current_signals, cfg.risk.max_position_fraction)
-                broker.buy_pct(sym, price, targets[sym])
+                broker.buy_pct(sym, price, targets[sym], ts=ts)
             elif prev_sig[sym] == 1 and sig == 0:
-                broker.sell_all(sym, price)
+                broker.sell_all(sym, price, ts=ts)
             prev_sig[sym] = sig
         broker.mark_to_market(ts, prices)
 
     return broker.equity_df(), broker.trades_df()
 
 
-__all__ = ["run_backtest"]
+def _align(data) -> tuple[MarketPanel, np.ndarray, list]:
+    """Return the panel, close matrix (0 where a bar is missing) and row positions per symbol."""
+    panel = as_panel(data)
+    close = np.where(panel.valid, panel.close, 0.0).astype(float)
+    rows_by_symbol = [np.flatnonzero(panel.valid[:, j]) for j in range(len(panel.symbols))]
+    return panel, close, rows_by_symbol
+
+
+@dataclass
+class Book:
+    """Cash, holdings and last signal per symbol carried between simulated chunks."""
+
+    cash: float
+    qty: np.ndarray
+    prev_sig: np.ndarray
+    held_order: List[int] = field(default_factory=list)
+
+    @classmethod
+    def start(cls, cash: float, n_symbols: int) -> "Book":
+        return cls(cash, np.zeros(n_symbols), np.zeros(n_symbols, dtype=np.int64))
+
+
+def run_backtest_vectorized(
+    df_by_symbol: Dict[str, pd.DataFrame] | MarketPanel,
+    strategy,
+    cfg,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Array implementation of :func:`run_backtest` with identical output.
+
+    Prices and signals are aligned into ``(time, symbol)`` matrices once and
+    entry/exit transitions are found with array ops. Cash only changes on bars
+    with a fill, so the sequential part walks those bars alone; positions and
+    equity for every other bar are forward-filled in bulk.
+    """
+    panel = as_panel(df_by_symbol)
+    book = Book.start(cfg.paper.starting_balance_eur, len(panel.symbols))
+    return simulate(panel, strategy.panel_signals(panel), cfg, book)
+
+
+def simulate(panel: MarketPanel, sig: np.ndarray, cfg, book: Book) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Simulate ``(time, symbol)`` signals over ``panel`` starting from ``book``.
+
+    ``book`` is updated in place so consecutive chunks can be simulated with
+    the same result as one pass over the whole history.
+    """
+    index, symbols, present = panel.index, panel.symbols, panel.valid
+    close = np.where(present, panel.close, 0.0).astype(float)
+    n_rows, n_syms = close.shape
+
+    buys = np.zeros((n_rows, n_syms), dtype=bool)
+    sells = np.zeros((n_rows, n_syms), dtype=bool)
+    for j in range(n_syms):
+        rows = np.flatnonzero(present[:, j])
+        if not len(rows):
+            continue
+        s = sig[rows, j]
+        prev = np.concatenate(([book.prev_sig[j]], s[:-1]))
+        buys[rows, j] = (prev == 0) & (s == 1)
+        sells[rows, j] = (prev == 1) & (s == 0)
+        book.prev_sig[j] = s[-1]
+
+    # Targets only see symbols already visited at the same bar, as in the loop.
+    active = np.cumsum(present & (sig == 1), axis=1)
+    max_frac = cfg.risk.max_position_fraction
+    fee_bps = cfg.paper.fee_bps
+    slippage_bps = cfg.paper.slippage_bps
+
+    event_rows = np.flatnonzero((buys | sells).any(axis=1))
+    cash = book.cash
+    qty = book.qty
+    held_order = book.held_order
+    # State after each fill bar; row 0 holds the starting state.
+    cash_at = np.empty(len(event_rows) + 1)
+    qty_at = np.empty((len(event_rows) + 1, n_syms))
+    cash_at[0] = cash
+    qty_at[0] = qty
+    trades = []
+    for k, r in enumerate(event_rows, start=1):
+        for j in np.flatnonzero(buys[r] | sells[r]):
+            price = close[r, j]
+            if buys[r, j]:
+                notional = cash * min(1 / active[r, j], max_frac)
+                q = notional / price
+                exec_price = apply_slippage(price, slippage_bps, "BUY")
+                cost = q * exec_price
+                fee = cost * fee_bps / 10000
+                cash -= cost + fee
+                qty[j] += q
+                if j not in held_order:
+                    held_order.append(j)
+                side = TradeSide.BUY.value
+            else:
+                q = qty[j]
+                if q <= 0:
+                    continue
+                exec_price = apply_slippage(price, slippage_bps, "SELL")
+                proceeds = q * exec_price
+                fee = proceeds * fee_bps / 10000
+                cash += proceeds - fee
+                qty[j] = 0
+                side = TradeSide.SELL.value
+            trades.append({
+                "ts": index[r],
+                "symbol": symbols[j],
+                "side": side,
+                "qty": q,
+                "price": exec_price,
+                "fee": fee,
+            })
+        cash_at[k] = cash
+        qty_at[k] = qty
+
+    # Position of the state in effect at each row (0 before the first fill).
+    state = np.searchsorted(event_rows, np.arange(n_rows), side="right")
+    cash_path = cash_at[state]
+    qty_path = qty_at[state]
+    # Sum in first-fill order so rounding matches PaperBroker.mark_to_market.
+    positions_value = np.zeros(n_rows)
+    for j in held_order:
+        positions_value = positions_value + qty_path[:, j] * close[:, j]
+
+    equity_df = pd.DataFrame(
+        {
+            "equity": cash_path + positions_value,
+            "cash": cash_path,
+            "positions_value": positions_value,
+        },
+        index=index,
+    )
+    book.cash = cash
+    return equity_df, pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+
+def run_backtest_batch(
+    df_by_symbol: Dict[str, pd.DataFrame] | MarketPanel,
+    signals_by_symbol: Dict[str, np.ndarray],
+    cfg,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Backtest many signal sets over the same data in one pass.
+
+    ``signals_by_symbol`` maps each symbol to a ``(len(df), n_sets)`` array of
+    signals, e.g. from ``Strategy.batch_signals``. Returns a ``(time, n_sets)``
+    equity frame and a trades frame whose ``set`` column is the column index.
+    Fills follow the rules of :func:`run_backtest`; equity agrees with it to
+    floating-point rounding.
+    """
+    panel, close, rows_by_symbol = _align(df_by_symbol)
+    index, symbols, present = panel.index, panel.symbols, panel.valid
+    n_rows, n_syms = close.shape
+    n_sets = np.shape(signals_by_symbol[symbols[0]])[1]
+
+    sig = np.zeros((n_rows, n_syms, n_sets), dtype=np.int8)
+    buys = np.zeros((n_rows, n_syms, n_sets), dtype=bool)
+    sells = np.zeros((n_rows, n_syms, n_sets), dtype=bool)
+    for j, sym in enumerate(symbols):
+        rows = rows_by_symbol[j]
+        s = np.asarray(signals_by_symbol[sym], dtype=np.int8)
+        prev = np.vstack([np.zeros((1, n_sets), dtype=np.int8), s[:-1]])
+        sig[rows, j] = s
+        buys[rows, j] = (prev == 0) & (s == 1)
+        sells[rows, j] = (prev == 1) & (s == 0)
+
+    active = np.maximum(np.cumsum(present[:, :, None] & (sig == 1), axis=1), 1)
+    max_frac = cfg.risk.max_position_fraction
+    fee_bps = cfg.paper.fee_bps
+    slippage_bps = cfg.paper.slippage_bps
+
+    event_rows = np.flatnonzero((buys | sells).any(axis=(1, 2)))
+    cash = np.full(n_sets, float(cfg.paper.starting_balance_eur))
+    qty = np.zeros((n_syms, n_sets))
+    cash_at = np.empty((len(event_rows) + 1, n_sets))
+    qty_at = np.empty((len(event_rows) + 1, n_syms, n_sets))
+    cash_at[0] = cash
+    qty_at[0] = qty
+    fills: Dict[str, list] = {
+        "set": [np.empty(0, dtype=np.int64)],
+        "row": [np.empty(0, dtype=np.int64)],
+        "sym": [np.empty(0, dtype=np.int64)],
+        "side": [np.empty(0, dtype=object)],
+        "qty": [np.empty(0)],
+        "price": [np.empty(0)],
+        "fee": [np.empty(0)],
+    }
+
+    def record(mask, r, j, side, q, price, fee):
+        sets = np.flatnonzero(mask)
+        fills["set"].append(sets)
+        fills["row"].append(np.full(len(sets), r))
+        fills["sym"].append(np.full(len(sets), j))
+        fills["side"].append(np.full(len(sets), side, dtype=object))
+        fills["qty"].append(q[sets])
+        fills["price"].append(np.full(len(sets), price))
+        fills["fee"].append(fee[sets])
+
+    for k, r in enumerate(event_rows, start=1):
+        for j in range(n_syms):
+            price = close[r, j]
+            buy = buys[r, j]
+            if buy.any():
+                q = cash * np.minimum(1 / active[r, j], max_frac) / price
+                exec_price = apply_slippage(price, slippage_bps, "BUY")
+                cost = q * exec_price
+                fee = cost * fee_bps / 10000
+                cash = np.where(buy, cash - (cost + fee), cash)
+                qty[j] = np.where(buy, qty[j] + q, qty[j])
+                record(buy, r, j, TradeSide.BUY.value, q, exec_price, fee)
+            sell = sells[r, j] & (qty[j] > 0)
+            if sell.any():
+                q = qty[j].copy()
+                exec_price = apply_slippage(price, slippage_bps, "SELL")
+                proceeds = q * exec_price
+                fee = proceeds * fee_bps / 10000
+                cash = np.where(sell, cash + (proceeds - fee), cash)
+                qty[j] = np.where(sell, 0.0, qty[j])
+                record(sell, r, j, TradeSide.SELL.value, q, exec_price, fee)
+        cash_at[k] = cash
+        qty_at[k] = qty
+
+    state = np.searchsorted(event_rows, np.arange(n_rows), side="right")
+    positions_value = (qty_at[state] * close[:, :, None]).sum(axis=1)
+    equity = pd.DataFrame(cash_at[state] + positions_value, index=index)
+
+    cols = {key: np.concatenate(parts) for key, parts in fills.items()}
+    trades = pd.DataFrame({
+        "set": cols["set"],
+        "ts": index[cols["row"]],
+        "symbol": np.asarray(symbols, dtype=object)[cols["sym"]],
+        "side": cols["side"],
+        "qty": cols["qty"],
+        "price": cols["price"],
+        "fee": cols["fee"],
+    })
+    trades = trades.sort_values("set", kind="stable", ignore_index=True)
+    return equity, trades
+
+
+__all__ = ["ENGINES", "Book", "run_backtest", "run_backtest_batch", "run_backtest_vectorized", "simulate"]
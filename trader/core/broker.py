@@ -5,6 +5,7 @@ import logging
 from dataclasses import dataclass, field
 from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 
 from ..utils import apply_slippage
@@ -12,82 +13,157 @@ from ..storage.models import TradeSide
 
 logger = logging.getLogger(__name__)
 
+TRADE_COLUMNS = ["ts", "symbol", "side", "qty", "price", "fee"]
+SIDES = [TradeSide.BUY.value, TradeSide.SELL.value]
+
+
+class Position:
+    """Holding in one symbol."""
+
+    __slots__ = ("qty", "avg_price")
+
+    def __init__(self, qty: float = 0.0, avg_price: float = 0.0) -> None:
+        self.qty = qty
+        self.avg_price = avg_price
+
+    def __repr__(self) -> str:
+        return f"Position(qty={self.qty}, avg_price={self.avg_price})"
+
+
+class Ledger:
+    """Append-only table of typed columns in preallocated arrays that double when full."""
+
+    def __init__(self, columns: Dict[str, type], capacity: int = 1024) -> None:
+        self.names = list(columns)
+        self._cols = [np.empty(capacity, dtype=dtype) for dtype in columns.values()]
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append(self, *values) -> None:
+        n = self._n
+        cols = self._cols
+        if n == len(cols[0]):
+            cols = self._cols = [np.concatenate([c, np.empty_like(c)]) for c in cols]
+        for col, value in zip(cols, values):
+            col[n] = value
+        self._n = n + 1
+
+    def column(self, name: str, start: int = 0) -> np.ndarray:
+        """Return a view of one column from row ``start`` onwards."""
+        return self._cols[self.names.index(name)][start:self._n]
+
+
+def _ts_ns(ts) -> int:
+    if isinstance(ts, pd.Timestamp):
+        return ts.value
+    return (pd.Timestamp.utcnow() if ts is None else pd.Timestamp(ts)).value
+
 
 @dataclass
 class PaperBroker:
-    """Very simple paper broker."""
+    """Very simple paper broker.
+
+    Fills and equity snapshots are kept in columnar :class:`Ledger` arrays
+    with symbols interned to integer ids.
+    """
 
     starting_eur: float
     fee_bps: float
     slippage_bps: float
     cash: float = field(init=False)
-    positions: Dict[str, Dict[str, float]] = field(default_factory=dict)
-    trades: List[Dict] = field(default_factory=list)
-    snapshots: List[Dict] = field(default_factory=list)
+    positions: Dict[str, Position] = field(default_factory=dict)
+    symbols: List[str] = field(default_factory=list)
 
     def __post_init__(self) -> None:
         self.cash = self.starting_eur
+        self._symbol_ids = {sym: i for i, sym in enumerate(self.symbols)}
+        self._trades = Ledger({
+            "ts": np.int64, "symbol": np.int32, "side": np.int8, "qty": float, "price": float, "fee": float,
+        })
+        self._snapshots = Ledger({"ts": np.int64, "equity": float, "cash": float, "positions_value": float})
+
+    def _symbol_id(self, symbol: str) -> int:
+        sid = self._symbol_ids.get(symbol)
+        if sid is None:
+            sid = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return sid
 
     # trading -------------------------------------------------
-    def buy_pct(self, symbol: str, price: float, pct_of_cash: float) -> None:
-        """Buy using a percentage of current cash."""
+    def buy_pct(
+        self, symbol: str, price: float, pct_of_cash: float, ts: pd.Timestamp | None = None
+    ) -> None:
+        """Buy using a percentage of current cash.
+
+        ``ts`` is the bar time of the fill; wall-clock time is used when omitted.
+        """
         notional = self.cash * pct_of_cash
         qty = notional / price
         exec_price = apply_slippage(price, self.slippage_bps, "BUY")
         cost = qty * exec_price
         fee = cost * self.fee_bps / 10000
         self.cash -= cost + fee
-        pos = self.positions.get(symbol, {"qty": 0.0, "avg_price": 0.0})
-        total_qty = pos["qty"] + qty
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = self.positions[symbol] = Position()
+        total_qty = pos.qty + qty
         if total_qty != 0:
-            pos["avg_price"] = (pos["qty"] * pos["avg_price"] + qty * exec_price) / total_qty
-        pos["qty"] = total_qty
-        self.positions[symbol] = pos
-        self.trades.append({
-            "ts": pd.Timestamp.utcnow(),
-            "symbol": symbol,
-            "side": TradeSide.BUY.value,
-            "qty": qty,
-            "price": exec_price,
-            "fee": fee,
-        })
+            pos.avg_price = (pos.qty * pos.avg_price + qty * exec_price) / total_qty
+        pos.qty = total_qty
+        self._trades.append(_ts_ns(ts), self._symbol_id(symbol), 0, qty, exec_price, fee)
 
-    def sell_all(self, symbol: str, price: float) -> None:
+    def sell_all(self, symbol: str, price: float, ts: pd.Timestamp | None = None) -> None:
         pos = self.positions.get(symbol)
-        if not pos or pos["qty"] <= 0:
+        if not pos or pos.qty <= 0:
             return
-        qty = pos["qty"]
+        qty = pos.qty
         exec_price = apply_slippage(price, self.slippage_bps, "SELL")
         proceeds = qty * exec_price
         fee = proceeds * self.fee_bps / 10000
         self.cash += proceeds - fee
-        pos["qty"] = 0
-        self.positions[symbol] = pos
-        self.trades.append({
-            "ts": pd.Timestamp.utcnow(),
-            "symbol": symbol,
-            "side": TradeSide.SELL.value,
-            "qty": qty,
-            "price": exec_price,
-            "fee": fee,
-        })
+        pos.qty = 0
+        self._trades.append(_ts_ns(ts), self._symbol_id(symbol), 1, qty, exec_price, fee)
 
     # accounting ------------------------------------------------
     def mark_to_market(self, ts: pd.Timestamp, prices: Dict[str, float]) -> None:
-        positions_value = sum(pos["qty"] * prices.get(sym, 0) for sym, pos in self.positions.items())
+        positions_value = sum(pos.qty * prices.get(sym, 0) for sym, pos in self.positions.items())
         equity = self.cash + positions_value
-        self.snapshots.append({
-            "ts": ts,
-            "equity": equity,
-            "cash": self.cash,
-            "positions_value": positions_value,
-        })
+        self._snapshots.append(_ts_ns(ts), equity, self.cash, positions_value)
+
+    @property
+    def n_trades(self) -> int:
+        return len(self._trades)
+
+    def last_snapshot(self) -> Dict:
+        """Return the latest snapshot as a dict with ``ts``, ``equity``, ``cash``, ``positions_value``."""
+        last = len(self._snapshots) - 1
+        snap = {name: self._snapshots.column(name, last)[0] for name in self._snapshots.names}
+        snap["ts"] = pd.Timestamp(snap["ts"], tz="UTC")
+        return snap
 
     def equity_df(self) -> pd.DataFrame:
-        return pd.DataFrame(self.snapshots).set_index("ts")
+        snaps = self._snapshots
+        return pd.DataFrame(
+            {name: snaps.column(name) for name in ("equity", "cash", "positions_value")},
+            index=pd.DatetimeIndex(pd.to_datetime(snaps.column("ts"), utc=True), name="ts"),
+        )
 
-    def trades_df(self) -> pd.DataFrame:
-        return pd.DataFrame(self.trades)
+    def trades_df(self, start: int = 0) -> pd.DataFrame:
+        """Return fills from position ``start`` onwards."""
+        trades = self._trades
+        return pd.DataFrame(
+            {
+                "ts": pd.to_datetime(trades.column("ts", start), utc=True),
+                "symbol": np.asarray(self.symbols, dtype=object)[trades.column("symbol", start)],
+                "side": np.asarray(SIDES, dtype=object)[trades.column("side", start)],
+                "qty": trades.column("qty", start),
+                "price": trades.column("price", start),
+                "fee": trades.column("fee", start),
+            },
+            columns=TRADE_COLUMNS,
+        )
 
 
-__all__ = ["PaperBroker"]
+__all__ = ["Ledger", "PaperBroker", "Position", "TRADE_COLUMNS"]
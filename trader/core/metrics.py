@@ -9,19 +9,108 @@ import pandas as pd
 from ..utils import timeframe_to_per_year_bars
 
 
-def _trade_stats(trades: pd.DataFrame) -> pd.DataFrame:
-    trades = trades.sort_values("ts")
-    records = []
-    entries: Dict[str, Dict] = {}
-    for _, t in trades.iterrows():
-        sym = t.symbol
-        if t.side == "BUY":
-            entries[sym] = t
-        elif t.side == "SELL" and sym in entries:
-            e = entries.pop(sym)
-            pnl = (t.price - e.price) * t.qty - e.fee - t.fee
-            records.append({"symbol": sym, "pnl": pnl})
-    return pd.DataFrame(records)
+TRIP_COLUMNS = [
+    "symbol", "entry_ts", "exit_ts", "qty", "entry_price", "exit_price", "pnl", "holding", "mae", "mfe",
+]
+
+
+def round_trips(trades: pd.DataFrame, prices=None, by: str | None = None) -> pd.DataFrame:
+    """Pair fills into round trips, flat to flat, per symbol.
+
+    Every BUY until the position is closed belongs to the same trip, so
+    partial adds are costed at their average price. With ``prices`` (a dict
+    of OHLCV frames or a ``MarketPanel``) each trip also gets its maximum
+    adverse and favourable excursion relative to the entry price. ``by``
+    names an extra column, e.g. ``set`` from ``run_backtest_batch``, whose
+    values are treated as separate books and kept in the output.
+    """
+    columns = TRIP_COLUMNS if by is None else [by] + TRIP_COLUMNS
+    if trades.empty:
+        return pd.DataFrame(columns=columns)
+    trades = trades.sort_values("ts", kind="stable", ignore_index=True)
+    symbol = trades["symbol"].to_numpy()
+    keys = [symbol] if by is None else [trades[by].to_numpy(), symbol]
+    buy = (trades["side"] == "BUY").to_numpy()
+    qty = trades["qty"].to_numpy(dtype=float)
+    value = qty * trades["price"].to_numpy(dtype=float)
+    position = pd.Series(np.where(buy, qty, -qty)).groupby(keys).cumsum().to_numpy()
+    closes = ~buy & (position <= 1e-9 * qty)
+    fills = pd.DataFrame({
+        "book": 0 if by is None else keys[0],
+        "symbol": symbol,
+        # trips closed earlier for the same symbol number the current trip
+        "trip": pd.Series(closes).groupby(keys).cumsum().to_numpy() - closes,
+        "ts": trades["ts"],
+        "entry_ts": trades["ts"].where(buy),
+        "buy_qty": np.where(buy, qty, 0.0),
+        "buy_value": np.where(buy, value, 0.0),
+        "sell_qty": np.where(buy, 0.0, qty),
+        "sell_value": np.where(buy, 0.0, value),
+        "fee": trades["fee"].to_numpy(dtype=float),
+        "closed": closes,
+    })
+    agg = fills.groupby(["book", "symbol", "trip"], sort=False).agg(
+        entry_ts=("entry_ts", "min"),
+        exit_ts=("ts", "max"),
+        buy_qty=("buy_qty", "sum"),
+        buy_value=("buy_value", "sum"),
+        sell_qty=("sell_qty", "sum"),
+        sell_value=("sell_value", "sum"),
+        fee=("fee", "sum"),
+        closed=("closed", "any"),
+    )
+    agg = agg[agg["closed"] & (agg["buy_qty"] > 0)].reset_index()
+    trips = pd.DataFrame({
+        "symbol": agg["symbol"],
+        "entry_ts": agg["entry_ts"],
+        "exit_ts": agg["exit_ts"],
+        "qty": agg["buy_qty"],
+        "entry_price": agg["buy_value"] / agg["buy_qty"],
+        "exit_price": agg["sell_value"] / agg["sell_qty"],
+        "pnl": agg["sell_value"] - agg["buy_value"] - agg["fee"],
+        "holding": agg["exit_ts"] - agg["entry_ts"],
+        "mae": np.nan,
+        "mfe": np.nan,
+    })
+    if by is not None:
+        trips.insert(0, by, agg["book"])
+    if prices is not None and not trips.empty:
+        _excursions(trips, prices)
+    return trips.sort_values("exit_ts", kind="stable", ignore_index=True)[columns]
+
+
+def _excursions(trips: pd.DataFrame, prices) -> None:
+    """Fill ``mae``/``mfe`` in place from the bars between entry and exit."""
+    for sym, group in trips.groupby("symbol"):
+        df = prices.frame(sym) if hasattr(prices, "frame") else prices[sym]
+        low = df["low" if "low" in df else "close"].to_numpy(dtype=float)
+        high = df["high" if "high" in df else "close"].to_numpy(dtype=float)
+        first = df.index.searchsorted(pd.DatetimeIndex(group["entry_ts"]), side="left")
+        last = df.index.searchsorted(pd.DatetimeIndex(group["exit_ts"]), side="right")
+        # reduceat over (first, last) pairs; the odd slots in between are discarded
+        bounds = np.column_stack([first, last]).ravel()
+        lows = np.minimum.reduceat(np.append(low, np.inf), bounds)[::2]
+        highs = np.maximum.reduceat(np.append(high, -np.inf), bounds)[::2]
+        entry = group["entry_price"].to_numpy()
+        trips.loc[group.index, "mae"] = lows / entry - 1
+        trips.loc[group.index, "mfe"] = highs / entry - 1
+
+
+def symbol_breakdown(trips: pd.DataFrame) -> pd.DataFrame:
+    """Summarise round trips from :func:`round_trips` per symbol."""
+    by_symbol = trips.groupby("symbol")
+    wins = trips["pnl"].clip(lower=0).groupby(trips["symbol"]).sum()
+    losses = -trips["pnl"].clip(upper=0).groupby(trips["symbol"]).sum()
+    return pd.DataFrame({
+        "trades": by_symbol.size(),
+        "pnl": by_symbol["pnl"].sum(),
+        "hit_rate": (trips["pnl"] > 0).groupby(trips["symbol"]).mean(),
+        "avg_trade": by_symbol["pnl"].mean(),
+        "profit_factor": (wins / losses).where(losses > 0),
+        "avg_holding": by_symbol["holding"].mean(),
+        "mae": by_symbol["mae"].mean(),
+        "mfe": by_symbol["mfe"].mean(),
+    })
 
 
 def compute_metrics(equity: pd.Series, trades: pd.DataFrame, timeframe: str) -> Dict[str, float]:
@@ -40,7 +129,7 @@ def compute_metrics(equity: pd.Series, trades: pd.DataFrame, timeframe: str) ->
     max_dd = drawdown.min()
     calmar = cagr / abs(max_dd) if max_dd != 0 else 0
 
-    trade_stats = _trade_stats(trades)
+    trade_stats = round_trips(trades)
     hit_rate = (trade_stats.pnl > 0).mean() if not trade_stats.empty else 0
     profit_factor = (
         trade_stats.pnl[trade_stats.pnl > 0].sum()
@@ -64,4 +153,192 @@ def compute_metrics(equity: pd.Series, trades: pd.DataFrame, timeframe: str) ->
     return metrics
 
 
-__all__ = ["compute_metrics"]
+def batch_metrics(equity, timeframe: str, trades: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Compute :func:`compute_metrics` for many equity curves at once.
+
+    ``equity`` is a ``(time, curve)`` array or DataFrame. Returns one row per
+    curve with CAGR, Sharpe, Sortino, MaxDrawdown, Calmar and Volatility. If
+    ``trades`` carries a ``set`` column indexing the curves (as returned by
+    ``run_backtest_batch``), HitRate, ProfitFactor and AvgTrade are added too.
+    """
+    curves = np.asarray(equity, dtype=float)
+    n_bars, n_curves = curves.shape
+    per_year = timeframe_to_per_year_bars(timeframe)
+    years = n_bars / per_year
+    returns = curves[1:] / curves[:-1] - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = (curves[-1] / curves[0]) ** (1 / years) - 1 if years > 0 else np.zeros(n_curves)
+        avg = returns.mean(axis=0) if len(returns) else np.full(n_curves, np.nan)
+        vol = returns.std(axis=0, ddof=1) if len(returns) > 1 else np.full(n_curves, np.nan)
+        neg = returns < 0
+        n_neg = neg.sum(axis=0)
+        neg_mean = np.where(neg, returns, 0).sum(axis=0) / n_neg
+        downside = np.sqrt((np.where(neg, returns - neg_mean, 0) ** 2).sum(axis=0) / (n_neg - 1))
+        downside = np.where(n_neg > 1, downside, np.nan)
+        sharpe = np.where(vol != 0, avg / vol * np.sqrt(per_year), 0)
+        sortino = np.where(downside != 0, avg / downside * np.sqrt(per_year), 0)
+        peaks = np.maximum.accumulate(curves, axis=0)
+        max_dd = ((curves - peaks) / peaks).min(axis=0)
+        calmar = np.where(max_dd != 0, cagr / np.abs(max_dd), 0)
+    out = pd.DataFrame({
+        "CAGR": cagr,
+        "Sharpe": sharpe,
+        "Sortino": sortino,
+        "MaxDrawdown": max_dd,
+        "Calmar": calmar,
+        "Volatility": vol * np.sqrt(per_year),
+    })
+    if trades is None:
+        return out
+    trips = round_trips(trades, by="set")
+    pnl = trips["pnl"].astype(float)
+    by_set = pnl.groupby(trips["set"])
+    wins = pnl.clip(lower=0).groupby(trips["set"]).sum()
+    losses = -pnl.clip(upper=0).groupby(trips["set"]).sum()
+    curve_ids = pd.RangeIndex(n_curves)
+    out.insert(5, "HitRate", (pnl > 0).groupby(trips["set"]).mean().reindex(curve_ids, fill_value=0).to_numpy())
+    out.insert(6, "ProfitFactor", (wins / losses).where(losses > 0).reindex(curve_ids).to_numpy())
+    out.insert(7, "AvgTrade", by_set.mean().reindex(curve_ids, fill_value=0).to_numpy())
+    return out
+
+
+class _Moments:
+    """Running count, mean and sum of squared deviations (Welford/Chan)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, values: np.ndarray) -> None:
+        """Fold a batch in with Chan's parallel update."""
+        if not len(values):
+            return
+        n_b = len(values)
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+
+    def std(self) -> float:
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+
+class OnlineMetrics:
+    """Incremental counterpart of :func:`compute_metrics`.
+
+    Feed equity with :meth:`update` (O(1) per bar) or :meth:`update_many`,
+    fills with :meth:`add_trade`, and read the same keys as
+    ``compute_metrics`` from :meth:`metrics` at any time.
+    """
+
+    def __init__(self, timeframe: str) -> None:
+        self.per_year = timeframe_to_per_year_bars(timeframe)
+        self.bars = 0
+        self.first = np.nan
+        self.last = np.nan
+        self.peak = -np.inf
+        self.max_dd = 0.0
+        self._returns = _Moments()
+        self._downside = _Moments()
+        # per symbol: [position, buy_qty, buy_value, sell_value, fees]
+        self._open: Dict[str, list] = {}
+        self.trips = 0
+        self.wins = 0
+        self.gross_win = 0.0
+        self.gross_loss = 0.0
+
+    def update(self, equity: float) -> None:
+        if self.bars:
+            ret = equity / self.last - 1
+            self._returns.add(ret)
+            if ret < 0:
+                self._downside.add(ret)
+        else:
+            self.first = equity
+        self.bars += 1
+        self.last = equity
+        self.peak = max(self.peak, equity)
+        self.max_dd = min(self.max_dd, (equity - self.peak) / self.peak)
+
+    def update_many(self, equity: np.ndarray) -> None:
+        """Fold in a chunk of consecutive equity values with array ops."""
+        equity = np.asarray(equity, dtype=float)
+        if not len(equity):
+            return
+        if not self.bars:
+            self.first = equity[0]
+        linked = equity if not self.bars else np.concatenate(([self.last], equity))
+        returns = linked[1:] / linked[:-1] - 1
+        self._returns.merge(returns)
+        self._downside.merge(returns[returns < 0])
+        peaks = np.maximum.accumulate(np.maximum(equity, self.peak))
+        self.max_dd = min(self.max_dd, ((equity - peaks) / peaks).min())
+        self.peak = peaks[-1]
+        self.bars += len(equity)
+        self.last = equity[-1]
+
+    def add_trade(self, symbol: str, side: str, qty: float, price: float, fee: float) -> None:
+        """Record a fill; trips close when the position returns to flat, as in :func:`round_trips`."""
+        book = self._open.setdefault(symbol, [0.0, 0.0, 0.0, 0.0, 0.0])
+        book[4] += fee
+        if side == "BUY":
+            book[0] += qty
+            book[1] += qty
+            book[2] += qty * price
+            return
+        book[0] -= qty
+        book[3] += qty * price
+        if book[0] > 1e-9 * qty:
+            return
+        if book[1] > 0:
+            pnl = book[3] - book[2] - book[4]
+            self.trips += 1
+            if pnl > 0:
+                self.wins += 1
+                self.gross_win += pnl
+            elif pnl < 0:
+                self.gross_loss -= pnl
+        del self._open[symbol]
+
+    def add_trades(self, trades: pd.DataFrame) -> None:
+        for t in trades.itertuples(index=False):
+            self.add_trade(t.symbol, t.side, t.qty, t.price, t.fee)
+
+    def metrics(self) -> Dict[str, float]:
+        per_year = self.per_year
+        years = self.bars / per_year
+        cagr = (self.last / self.first) ** (1 / years) - 1 if years > 0 else 0
+        avg = self._returns.mean if self._returns.n else np.nan
+        vol = self._returns.std()
+        downside = self._downside.std()
+        sharpe = (avg / vol) * np.sqrt(per_year) if vol != 0 else 0
+        sortino = (avg / downside) * np.sqrt(per_year) if downside != 0 else 0
+        max_dd = self.max_dd
+        calmar = cagr / abs(max_dd) if max_dd != 0 else 0
+        net = self.gross_win - self.gross_loss
+        return {
+            "CAGR": cagr,
+            "Sharpe": sharpe,
+            "Sortino": sortino,
+            "MaxDrawdown": max_dd,
+            "Calmar": calmar,
+            "HitRate": self.wins / self.trips if self.trips else 0,
+            "ProfitFactor": self.gross_win / self.gross_loss if self.gross_loss > 0 else np.nan,
+            "AvgTrade": net / self.trips if self.trips else 0,
+            "Volatility": vol * np.sqrt(per_year),
+        }
+
+
+__all__ = ["OnlineMetrics", "batch_metrics", "compute_metrics", "round_trips", "symbol_breakdown"]
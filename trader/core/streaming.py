@@ -0,0 +1,205 @@
+"""Bounded-memory backtests over streams of bar chunks."""
+from __future__ import annotations
+
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+
+from .backtest import Book, simulate
+from .metrics import OnlineMetrics
+from ..data.panel import MarketPanel, as_panel
+from ..storage.db import get_session
+from ..storage.models import AccountSnapshot, Trade
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestSink(ABC):
+    """Destination for the equity and trades chunks of a streaming backtest."""
+
+    @abstractmethod
+    def write(self, equity: pd.DataFrame, trades: pd.DataFrame) -> None:
+        """Consume one chunk of equity snapshots and fills."""
+
+    def close(self) -> None:
+        """Flush anything buffered; called once after the last chunk."""
+
+
+class CallbackSink(BacktestSink):
+    """Hand every chunk to ``callback(equity, trades)``."""
+
+    def __init__(self, callback: Callable[[pd.DataFrame, pd.DataFrame], None]) -> None:
+        self.callback = callback
+
+    def write(self, equity: pd.DataFrame, trades: pd.DataFrame) -> None:
+        self.callback(equity, trades)
+
+
+class FrameSink(BacktestSink):
+    """Collect chunks in memory, for results that fit in RAM."""
+
+    def __init__(self) -> None:
+        self.equity: List[pd.DataFrame] = []
+        self.trades: List[pd.DataFrame] = []
+
+    def write(self, equity: pd.DataFrame, trades: pd.DataFrame) -> None:
+        self.equity.append(equity)
+        if not trades.empty:
+            self.trades.append(trades)
+
+    def equity_df(self) -> pd.DataFrame:
+        return pd.concat(self.equity)
+
+    def trades_df(self) -> pd.DataFrame:
+        return pd.concat(self.trades, ignore_index=True) if self.trades else pd.DataFrame()
+
+
+class ParquetSink(BacktestSink):
+    """Write one Parquet part file per chunk under ``directory`` (needs pyarrow)."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        (self.directory / "equity").mkdir(parents=True, exist_ok=True)
+        (self.directory / "trades").mkdir(parents=True, exist_ok=True)
+        self.part = 0
+
+    def write(self, equity: pd.DataFrame, trades: pd.DataFrame) -> None:
+        name = f"part-{self.part:05d}.parquet"
+        equity.to_parquet(self.directory / "equity" / name)
+        if not trades.empty:
+            trades.to_parquet(self.directory / "trades" / name, index=False)
+        self.part += 1
+
+
+class SQLiteSink(BacktestSink):
+    """Bulk insert snapshots and trades into the trader database under ``run_id``."""
+
+    def __init__(self, run_id: int) -> None:
+        self.run_id = run_id
+
+    def write(self, equity: pd.DataFrame, trades: pd.DataFrame) -> None:
+        with get_session() as session:
+            if not equity.empty:
+                rows = equity.reset_index().assign(run_id=self.run_id).to_dict("records")
+                session.execute(insert(AccountSnapshot), rows)
+            if not trades.empty:
+                rows = trades.assign(run_id=self.run_id).to_dict("records")
+                session.execute(insert(Trade), rows)
+            session.commit()
+
+
+def panel_chunks(data, rows: int) -> Iterator[MarketPanel]:
+    """Split in-memory data into consecutive zero-copy chunks of ``rows`` bars."""
+    panel = as_panel(data)
+    for start in range(0, len(panel), rows):
+        yield panel.iloc(start, start + rows)
+
+
+def align_chunks(
+    streams: Dict[str, Iterable[pd.DataFrame]], span: pd.Timedelta
+) -> Iterator[Dict[str, pd.DataFrame]]:
+    """Merge per-symbol streams of time-sorted frames into chunks of ``span``.
+
+    Each stream can be anything that yields OHLCV frames indexed by ``ts``,
+    e.g. ``pd.read_csv(path, index_col="ts", parse_dates=True, chunksize=n)``.
+    At most one source frame plus one span is buffered per symbol.
+    """
+    sources = {sym: iter(it) for sym, it in streams.items()}
+    first = {sym: next(it, None) for sym, it in sources.items()}
+    exhausted = {sym for sym, df in first.items() if df is None}
+    if len(exhausted) == len(first):
+        return
+    template = next(df for df in first.values() if df is not None).iloc[:0]
+    buffers = {sym: (template if df is None else df) for sym, df in first.items()}
+
+    def fill(sym: str, until) -> None:
+        while sym not in exhausted and (buffers[sym].empty or buffers[sym].index[-1] < until):
+            nxt = next(sources[sym], None)
+            if nxt is None:
+                exhausted.add(sym)
+            else:
+                buffers[sym] = pd.concat([buffers[sym], nxt])
+
+    start = min(buf.index[0] for buf in buffers.values() if not buf.empty)
+    while True:
+        end = start + span
+        for sym in buffers:
+            fill(sym, end)
+        chunk = {}
+        for sym, buf in buffers.items():
+            cut = buf.index.searchsorted(end, side="left")
+            chunk[sym], buffers[sym] = buf.iloc[:cut], buf.iloc[cut:]
+        if any(not df.empty for df in chunk.values()):
+            yield chunk
+        pending = [buf.index[0] for buf in buffers.values() if not buf.empty]
+        if not pending and len(exhausted) == len(buffers):
+            return
+        # skip empty spans across gaps in every stream
+        start = max(end, min(pending)) if pending else end
+
+
+def run_backtest_streaming(
+    chunks: Iterable[Dict[str, pd.DataFrame] | MarketPanel],
+    strategy,
+    cfg,
+    sink: BacktestSink,
+    metrics: OnlineMetrics | None = None,
+) -> Dict[str, float]:
+    """Backtest over an iterator of bar chunks, writing results to ``sink``.
+
+    Each chunk maps every symbol to its bars for one time range (or is a
+    :class:`MarketPanel`); chunks must arrive in time order with the same
+    symbols. Between chunks only the book and each strategy's stream state
+    are kept, so memory depends on the chunk size and indicator lookback, not
+    on the history length. Results match :func:`run_backtest` over the
+    concatenated data.
+
+    ``metrics`` (created if omitted) is updated after every chunk, so callers
+    can query running performance; its final values are part of the summary.
+    """
+    metrics = metrics or OnlineMetrics(cfg.timeframe)
+    symbols: List[str] | None = None
+    book: Book | None = None
+    states: Dict[str, object] = {}
+    summary = {"bars": 0, "trades": 0, "equity": cfg.paper.starting_balance_eur}
+    for chunk in chunks:
+        panel = as_panel(chunk)
+        if symbols is None:
+            symbols = panel.symbols
+            book = Book.start(cfg.paper.starting_balance_eur, len(symbols))
+        elif panel.symbols != symbols:
+            raise ValueError("every chunk must list the same symbols in the same order")
+        if not len(panel):
+            continue
+        sig = np.zeros((len(panel), len(symbols)), dtype=np.int64)
+        for j, sym in enumerate(symbols):
+            signals, states[sym] = strategy.stream_signals(panel.frame(sym), states.get(sym))
+            sig[panel.valid[:, j], j] = signals.ffill().fillna(book.prev_sig[j]).to_numpy()
+        equity, trades = simulate(panel, sig, cfg, book)
+        sink.write(equity, trades)
+        metrics.update_many(equity["equity"].to_numpy())
+        metrics.add_trades(trades)
+        summary["bars"] += len(equity)
+        summary["trades"] += len(trades)
+        summary["equity"] = equity["equity"].iloc[-1]
+    sink.close()
+    summary.update(metrics.metrics())
+    logger.info("streaming backtest finished %s", summary)
+    return summary
+
+
+__all__ = [
+    "BacktestSink",
+    "CallbackSink",
+    "FrameSink",
+    "ParquetSink",
+    "SQLiteSink",
+    "align_chunks",
+    "panel_chunks",
+    "run_backtest_streaming",
+]
@@ -0,0 +1,148 @@
+"""Concurrent market data fetching on ccxt's asyncio clients."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Sequence, TypeVar
+
+import ccxt.async_support as ccxt_async
+import pandas as pd
+
+from .feed import RETRYABLE, _resolve_network, _retry_delay, _to_frame
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _with_retries_async(
+    call: Callable[[], Awaitable[T]], what: str, max_retries: int, backoff_base_ms: int
+) -> T:
+    """Await ``call()`` with the retry and backoff rules of the sync feed."""
+    for attempt in range(1, (max_retries or 1) + 1):
+        try:
+            return await call()
+        except RETRYABLE as exc:
+            if attempt >= (max_retries or 1):
+                logger.error("%s failed after %s attempts: %s", what, attempt, exc)
+                raise RuntimeError(f"{what} failed after {attempt} attempts: {exc}") from exc
+            logger.warning("%s retry %s/%s: %s", what, attempt, max_retries, exc)
+            await asyncio.sleep(_retry_delay(attempt, backoff_base_ms))
+    raise AssertionError("unreachable")
+
+
+class AsyncFeed:
+    """Fetches bars for many symbols at once, at most ``concurrency`` requests in flight.
+
+    Use as ``async with AsyncFeed(...) as feed``; the ccxt client (one HTTP
+    session) is closed on exit. A client passed as ``exchange`` is used
+    as is and not closed.
+    """
+
+    def __init__(
+        self,
+        exchange_name: str,
+        *,
+        concurrency: int = 8,
+        exchange=None,
+        timeout_ms: int | None = None,
+        max_retries: int | None = None,
+        backoff_base_ms: int | None = None,
+        user_agent: str | None = None,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> None:
+        timeout_ms, self.max_retries, self.backoff_base_ms, user_agent, proxies = _resolve_network(
+            timeout_ms, max_retries, backoff_base_ms, user_agent, proxies
+        )
+        self._owned = exchange is None
+        if exchange is None:
+            params = {"enableRateLimit": True, "timeout": timeout_ms, "userAgent": user_agent}
+            if proxies:
+                params["aiohttp_proxy"] = proxies.get("https") or proxies.get("http")
+            exchange = getattr(ccxt_async, exchange_name)(params)
+        self.exchange = exchange
+        self.concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncFeed":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._owned:
+            await self.exchange.close()
+
+    async def fetch_ohlcv(
+        self, symbol: str, timeframe: str, limit: int, since: int | None = None
+    ) -> pd.DataFrame:
+        """Fetch one page of bars for ``symbol``, as :func:`trader.data.feed.fetch_ohlcv`."""
+        if self._semaphore is None:
+            # created lazily so it binds to the running loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def request():
+            async with self._semaphore:
+                return await self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+        raw = await _with_retries_async(
+            request, f"fetch_ohlcv {symbol}", self.max_retries, self.backoff_base_ms
+        )
+        return _to_frame(raw)
+
+    async def fetch_all(
+        self, symbols: Sequence[str], timeframe: str, limit: int, return_exceptions: bool = False
+    ) -> Dict[str, pd.DataFrame]:
+        """Fetch the latest ``limit`` bars of every symbol concurrently.
+
+        With ``return_exceptions`` a symbol that fails maps to its exception
+        instead of failing the whole call.
+        """
+        frames = await asyncio.gather(
+            *(self.fetch_ohlcv(s, timeframe, limit) for s in symbols), return_exceptions=return_exceptions
+        )
+        return dict(zip(symbols, frames))
+
+    async def poll_latest(self, symbols: Sequence[str], timeframe: str) -> Dict[str, pd.DataFrame]:
+        """Fetch the latest bar of every symbol concurrently."""
+        return await self.fetch_all(symbols, timeframe, 1)
+
+
+class SyncFeed:
+    """Blocking facade over :class:`AsyncFeed` for the runner scripts.
+
+    It owns a private event loop, so one client and its connections are
+    reused across calls; call :meth:`close` when done.
+    """
+
+    def __init__(self, exchange_name: str, **kwargs) -> None:
+        self._loop = asyncio.new_event_loop()
+        self.feed = AsyncFeed(exchange_name, **kwargs)
+
+    def fetch_all(self, symbols: Sequence[str], timeframe: str, limit: int) -> Dict[str, pd.DataFrame]:
+        return self._loop.run_until_complete(self.feed.fetch_all(symbols, timeframe, limit))
+
+    def poll_latest(self, symbols: Sequence[str], timeframe: str) -> Dict[str, pd.DataFrame]:
+        return self._loop.run_until_complete(self.feed.poll_latest(symbols, timeframe))
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self.feed.close())
+        self._loop.close()
+
+    def __enter__(self) -> "SyncFeed":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def fetch_all(
+    exchange_name: str, symbols: Sequence[str], timeframe: str, limit: int, **kwargs
+) -> Dict[str, pd.DataFrame]:
+    """Fetch the latest ``limit`` bars of every symbol concurrently, blocking until done."""
+    with SyncFeed(exchange_name, **kwargs) as feed:
+        return feed.fetch_all(list(symbols), timeframe, limit)
+
+
+__all__ = ["AsyncFeed", "SyncFeed", "fetch_all"]
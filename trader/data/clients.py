@@ -0,0 +1,94 @@
+"""Process-wide pool of reusable ccxt exchange clients."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import ccxt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MARKETS_TTL = 3600.0
+
+
+def make_client(
+    name: str,
+    timeout_ms: int = 20000,
+    user_agent: str = "TraderBot/1.0",
+    proxies: Optional[Dict[str, str]] = None,
+    rate_limited: bool = True,
+) -> ccxt.Exchange:
+    """Build a new ccxt client for exchange ``name``."""
+    cls = getattr(ccxt, name)
+    params = {"enableRateLimit": rate_limited, "timeout": timeout_ms, "userAgent": user_agent}
+    if proxies:
+        params["proxies"] = proxies
+    return cls(params)
+
+
+class ClientPool:
+    """ccxt clients keyed by exchange, timeout, user agent, proxies and rate limiting.
+
+    Reusing a client keeps its HTTP session (and keep-alive connections) and
+    its loaded markets; :meth:`load_markets` reloads them once they are older
+    than ``markets_ttl`` seconds.
+    """
+
+    def __init__(self, markets_ttl: float = DEFAULT_MARKETS_TTL) -> None:
+        self.markets_ttl = markets_ttl
+        self.created = 0
+        self.reused = 0
+        self.market_loads = 0
+        self._clients: Dict[Tuple, ccxt.Exchange] = {}
+        self._loaded: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        name: str,
+        timeout_ms: int = 20000,
+        user_agent: str = "TraderBot/1.0",
+        proxies: Optional[Dict[str, str]] = None,
+        rate_limited: bool = True,
+    ) -> ccxt.Exchange:
+        key = (name, timeout_ms, user_agent, tuple(sorted((proxies or {}).items())), rate_limited)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.reused += 1
+                return client
+            client = make_client(name, timeout_ms, user_agent, proxies, rate_limited)
+            self._clients[key] = client
+            self.created += 1
+        logger.debug("created %s client (%s pooled)", name, len(self._clients))
+        return client
+
+    def load_markets(self, client: ccxt.Exchange) -> None:
+        """Load ``client``'s markets unless they were loaded within the TTL."""
+        loaded = self._loaded.get(id(client))
+        if loaded is not None and time.monotonic() - loaded < self.markets_ttl:
+            return
+        client.load_markets(reload=loaded is not None)
+        self._loaded[id(client)] = time.monotonic()
+        self.market_loads += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._loaded.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "clients": len(self._clients),
+            "created": self.created,
+            "reused": self.reused,
+            "market_loads": self.market_loads,
+        }
+
+
+CLIENTS = ClientPool()
+
+
+__all__ = ["CLIENTS", "ClientPool", "DEFAULT_MARKETS_TTL", "make_client"]
@@ -3,16 +3,25 @@ from __future__ import annotations
 
 import logging
 import random
+import threading
 import time
-from typing import Dict, Optional
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 import ccxt
+import numpy as np
 import pandas as pd
 
+from .clients import CLIENTS
 from ..config import load_config
+from ..utils import timeframe_to_seconds
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def _exchange(
     name: str,
@@ -20,12 +29,77 @@ def _exchange(
     user_agent: str = "TraderBot/1.0",
     proxies: Optional[Dict[str, str]] = None,
 ) -> ccxt.Exchange:
-    cls = getattr(ccxt, name)
-    params = {"enableRateLimit": True, "timeout": timeout_ms, "userAgent": user_agent}
-    if proxies:
-        params["proxies"] = proxies
-    ex = cls(params)
-    return ex
+    return CLIENTS.get(name, timeout_ms=timeout_ms, user_agent=user_agent, proxies=proxies)
+
+
+def network_kwargs(cfg) -> Dict:
+    """Network keyword arguments of the fetch helpers, resolved from ``cfg``."""
+    return dict(
+        timeout_ms=cfg.network.timeout_ms,
+        max_retries=cfg.network.max_retries,
+        backoff_base_ms=cfg.network.backoff_base_ms,
+        user_agent=cfg.network.user_agent,
+        proxies=cfg.proxies.dict(exclude_none=True),
+    )
+
+
+@lru_cache(maxsize=1)
+def _default_network() -> Dict:
+    return network_kwargs(load_config())
+
+
+def _resolve_network(
+    timeout_ms: int | None,
+    max_retries: int | None,
+    backoff_base_ms: int | None,
+    user_agent: str | None,
+    proxies: Optional[Dict[str, str]],
+) -> Tuple[int, int, int, str, Optional[Dict[str, str]]]:
+    """Fill unset network settings from the config file, read once per process."""
+    if None in (timeout_ms, max_retries, backoff_base_ms, user_agent):
+        net = _default_network()
+        timeout_ms = timeout_ms or net["timeout_ms"]
+        max_retries = max_retries or net["max_retries"]
+        backoff_base_ms = backoff_base_ms or net["backoff_base_ms"]
+        user_agent = user_agent or net["user_agent"]
+        proxies = proxies or net["proxies"]
+    return timeout_ms, max_retries, backoff_base_ms, user_agent, proxies
+
+
+RETRYABLE = (ccxt.NetworkError, ccxt.ExchangeNotAvailable, ccxt.RequestTimeout)
+
+
+def _retry_delay(attempt: int, backoff_base_ms: int) -> float:
+    """Seconds to wait after failed ``attempt``: exponential backoff plus up to 100% jitter."""
+    delay = (backoff_base_ms or 0) * (2 ** (attempt - 1)) / 1000.0
+    return delay + random.uniform(0, delay)
+
+
+def _with_retries(call: Callable[[], T], what: str, max_retries: int, backoff_base_ms: int) -> T:
+    """Run ``call``, retrying network errors with exponential backoff and jitter."""
+    last_exc: Exception | None = None
+    for attempt in range(1, (max_retries or 1) + 1):
+        try:
+            return call()
+        except RETRYABLE as exc:
+            last_exc = exc
+            if attempt == max_retries:
+                logger.error("%s failed after %s attempts: %s", what, attempt, exc)
+                raise RuntimeError(f"{what} failed after {attempt} attempts: {exc}") from exc
+            logger.warning("%s retry %s/%s: %s", what, attempt, max_retries, exc)
+            time.sleep(_retry_delay(attempt, backoff_base_ms))
+        except Exception as exc:  # pragma: no cover
+            logger.error("%s failed: %s", what, exc)
+            raise
+    # Should not happen but keeps mypy happy
+    raise RuntimeError(f"{what} failed: {last_exc}")
+
+
+def _to_frame(raw: List[List[float]]) -> pd.DataFrame:
+    df = pd.DataFrame(raw, columns=["ts", "open", "high", "low", "close", "volume"])
+    df["ts"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
+    df = df.set_index("ts")
+    return df
 
 
 def fetch_ohlcv(
@@ -39,42 +113,144 @@ def fetch_ohlcv(
     backoff_base_ms: int | None = None,
     user_agent: str | None = None,
     proxies: Optional[Dict[str, str]] = None,
+    since: int | None = None,
 ) -> pd.DataFrame:
-    """Fetch OHLCV data and return DataFrame with UTC index."""
-    if None in (timeout_ms, max_retries, backoff_base_ms, user_agent):
-        cfg = load_config()
-        net = cfg.network
-        timeout_ms = timeout_ms or net.timeout_ms
-        max_retries = max_retries or net.max_retries
-        backoff_base_ms = backoff_base_ms or net.backoff_base_ms
-        user_agent = user_agent or net.user_agent
-        proxies = proxies or cfg.proxies.dict(exclude_none=True)
+    """Fetch OHLCV data and return DataFrame with UTC index.
 
+    ``since`` (milliseconds since the epoch) fetches from that bar onwards
+    instead of the most recent ``limit`` bars.
+    """
+    timeout_ms, max_retries, backoff_base_ms, user_agent, proxies = _resolve_network(
+        timeout_ms, max_retries, backoff_base_ms, user_agent, proxies
+    )
     ex = _exchange(exchange_name, timeout_ms=timeout_ms, user_agent=user_agent, proxies=proxies)
-    last_exc: Exception | None = None
-    for attempt in range(1, (max_retries or 1) + 1):
-        try:
-            raw = ex.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-            break
-        except (ccxt.NetworkError, ccxt.ExchangeNotAvailable, ccxt.RequestTimeout) as exc:
-            last_exc = exc
-            if attempt == max_retries:
-                logger.error("fetch_ohlcv failed after %s attempts: %s", attempt, exc)
-                raise RuntimeError(f"fetch_ohlcv failed after {attempt} attempts: {exc}") from exc
-            delay = (backoff_base_ms or 0) * (2 ** (attempt - 1)) / 1000.0
-            delay += random.uniform(0, delay)
-            logger.warning("fetch_ohlcv retry %s/%s: %s", attempt, max_retries, exc)
-            time.sleep(delay)
-        except Exception as exc:  # pragma: no cover
-            logger.error("fetch_ohlcv failed: %s", exc)
-            raise
-    else:
-        # Should not happen but keeps mypy happy
-        raise RuntimeError(f"fetch_ohlcv failed: {last_exc}")
 
-    df = pd.DataFrame(raw, columns=["ts", "open", "high", "low", "close", "volume"])
-    df["ts"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
-    df = df.set_index("ts")
+    def request() -> List[List[float]]:
+        CLIENTS.load_markets(ex)
+        return ex.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+    raw = _with_retries(request, "fetch_ohlcv", max_retries, backoff_base_ms)
+    return _to_frame(raw)
+
+
+class RateLimiter:
+    """Space calls at least ``interval`` seconds apart across threads."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_LIMITERS: "weakref.WeakKeyDictionary[ccxt.Exchange, RateLimiter]" = weakref.WeakKeyDictionary()
+_LIMITERS_LOCK = threading.Lock()
+
+
+def _limiter(exchange: ccxt.Exchange) -> RateLimiter:
+    """The limiter shared by every range fetch on ``exchange``, paced by its ``rateLimit``."""
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(exchange)
+        if limiter is None:
+            limiter = _LIMITERS[exchange] = RateLimiter(getattr(exchange, "rateLimit", 0) / 1000.0)
+        return limiter
+
+
+def find_gaps(df: pd.DataFrame, timeframe: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Return ``(last bar before, first bar after)`` for every run of missing bars in ``df``."""
+    step = pd.Timedelta(seconds=timeframe_to_seconds(timeframe))
+    index = df.index
+    jumps = np.flatnonzero(np.diff(index.asi8) > step.value)
+    return [(index[i], index[i + 1]) for i in jumps]
+
+
+def fetch_ohlcv_range(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    *,
+    page_limit: int = 1000,
+    max_workers: int = 4,
+    exchange: Optional[ccxt.Exchange] = None,
+    timeout_ms: int | None = None,
+    max_retries: int | None = None,
+    backoff_base_ms: int | None = None,
+    user_agent: str | None = None,
+    proxies: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """Fetch every bar in ``[start, end)``, downloading pages concurrently.
+
+    The range is split into pages of ``page_limit`` bars fetched by up to
+    ``max_workers`` threads; request starts are spaced by the exchange's
+    ``rateLimit`` across all concurrent range fetches on the same client, so
+    throughput is bounded by the rate limit rather than by round-trips. A
+    page the exchange returns short (its own cap is lower) is continued from
+    its last bar. Pages are stitched and deduplicated, and missing bars are
+    logged.
+    """
+    timeout_ms, max_retries, backoff_base_ms, user_agent, proxies = _resolve_network(
+        timeout_ms, max_retries, backoff_base_ms, user_agent, proxies
+    )
+    pooled = exchange is None
+    if pooled:
+        # requests are paced by the shared limiter below, across all threads
+        exchange = CLIENTS.get(
+            exchange_name, timeout_ms=timeout_ms, user_agent=user_agent, proxies=proxies, rate_limited=False
+        )
+    limiter = _limiter(exchange)
+    step_ms = timeframe_to_seconds(timeframe) * 1000
+    start_ms = -(-pd.Timestamp(start).value // 10**6 // step_ms) * step_ms
+    end_ms = pd.Timestamp(end).value // 10**6
+    page_ms = page_limit * step_ms
+    bounds = [(lo, min(lo + page_ms, end_ms)) for lo in range(start_ms, end_ms, page_ms)]
+
+    def fetch_page(lo: int, hi: int) -> List[List[float]]:
+        rows: List[List[float]] = []
+        since = lo
+
+        def request() -> List[List[float]]:
+            if pooled:
+                CLIENTS.load_markets(exchange)
+            limiter.wait()
+            return exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=page_limit)
+
+        while since < hi:
+            raw = _with_retries(request, "fetch_ohlcv_range", max_retries, backoff_base_ms)
+            raw = [row for row in raw if since <= row[0] < hi]
+            if not raw:
+                break
+            rows.extend(raw)
+            since = raw[-1][0] + step_ms
+        return rows
+
+    if len(bounds) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(bounds))) as pool:
+            pages = list(pool.map(lambda b: fetch_page(*b), bounds))
+    else:
+        pages = [fetch_page(*b) for b in bounds]
+    df = _to_frame([row for page in pages for row in page])
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    gaps = find_gaps(df, timeframe)
+    logger.info("fetched %s %s bars of %s in %s pages", len(df), timeframe, symbol, len(bounds))
+    if gaps:
+        missing = sum((b - a) // pd.Timedelta(milliseconds=step_ms) - 1 for a, b in gaps)
+        logger.warning(
+            "%s %s has %s gaps (%s missing bars), first %s -> %s",
+            symbol,
+            timeframe,
+            len(gaps),
+            missing,
+            *gaps[0],
+        )
     return df
 
 
@@ -103,4 +279,75 @@ def poll_latest(
     )
 
 
-__all__ = ["fetch_ohlcv", "poll_latest"]
+def poll_latest_all(
+    exchange_name: str,
+    symbols: Sequence[str],
+    timeframe: str,
+    *,
+    concurrency: int = 8,
+    exchange: Optional[ccxt.Exchange] = None,
+    timeout_ms: int | None = None,
+    max_retries: int | None = None,
+    backoff_base_ms: int | None = None,
+    user_agent: str | None = None,
+    proxies: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """Return a snapshot of the latest price of every symbol, in as few requests as possible.
+
+    The result is indexed by ``symbols`` with columns ``ts`` (time of the
+    price), ``bar`` (start of the bar it falls in) and ``price``. Exchanges
+    supporting ``fetchTickers`` answer for the whole universe in one call;
+    symbols missing from it, or every symbol otherwise, fall back to the
+    latest bar fetched on up to ``concurrency`` threads.
+    """
+    timeout_ms, max_retries, backoff_base_ms, user_agent, proxies = _resolve_network(
+        timeout_ms, max_retries, backoff_base_ms, user_agent, proxies
+    )
+    pooled = exchange is None
+    if pooled:
+        exchange = _exchange(exchange_name, timeout_ms=timeout_ms, user_agent=user_agent, proxies=proxies)
+        CLIENTS.load_markets(exchange)
+    step_ms = timeframe_to_seconds(timeframe) * 1000
+    rows: Dict[str, Tuple[int, int, float]] = {}
+    if getattr(exchange, "has", {}).get("fetchTickers"):
+        tickers = _with_retries(
+            lambda: exchange.fetch_tickers(list(symbols)), "fetch_tickers", max_retries, backoff_base_ms
+        )
+        now_ms = int(time.time() * 1000)
+        for sym in symbols:
+            ticker = tickers.get(sym) or {}
+            price = ticker.get("last")
+            if price is None:
+                price = ticker.get("close")
+            if price is not None:
+                ts = ticker.get("timestamp") or now_ms
+                rows[sym] = (ts, ts // step_ms * step_ms, price)
+
+    def latest_bar(sym: str) -> Tuple[str, Tuple[int, int, float]]:
+        raw = _with_retries(
+            lambda: exchange.fetch_ohlcv(sym, timeframe=timeframe, limit=1),
+            "poll_latest",
+            max_retries,
+            backoff_base_ms,
+        )
+        return sym, (raw[-1][0], raw[-1][0], raw[-1][4])
+
+    missing = [s for s in symbols if s not in rows]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(missing))) as pool:
+            rows.update(pool.map(latest_bar, missing))
+    snap = pd.DataFrame.from_dict(rows, orient="index", columns=["ts", "bar", "price"]).reindex(list(symbols))
+    snap["ts"] = pd.to_datetime(snap["ts"], unit="ms", utc=True)
+    snap["bar"] = pd.to_datetime(snap["bar"], unit="ms", utc=True)
+    return snap
+
+
+__all__ = [
+    "RateLimiter",
+    "fetch_ohlcv",
+    "fetch_ohlcv_range",
+    "find_gaps",
+    "network_kwargs",
+    "poll_latest",
+    "poll_latest_all",
+]
@@ -0,0 +1,133 @@
+"""Aligned multi-symbol OHLCV container."""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class MarketPanel:
+    """OHLCV for several symbols on one shared timestamp axis.
+
+    ``values`` has shape ``(field, time, symbol)`` so every field is a
+    contiguous ``(time, symbol)`` block; ``valid`` marks the bars each symbol
+    actually has. Rows missing for a symbol hold NaN.
+    """
+
+    index: pd.DatetimeIndex
+    symbols: List[str]
+    values: np.ndarray
+    valid: np.ndarray
+
+    @classmethod
+    def from_frames(cls, df_by_symbol: Dict[str, pd.DataFrame], dtype=np.float64) -> "MarketPanel":
+        """Align per-symbol OHLCV frames, e.g. from ``fetch_ohlcv``."""
+        symbols = list(df_by_symbol)
+        index = df_by_symbol[symbols[0]].index
+        for sym in symbols[1:]:
+            index = index.union(df_by_symbol[sym].index)
+        index = index.rename("ts")
+        values = np.full((len(FIELDS), len(index), len(symbols)), np.nan, dtype=dtype)
+        valid = np.zeros((len(index), len(symbols)), dtype=bool)
+        for j, sym in enumerate(symbols):
+            df = df_by_symbol[sym]
+            rows = index.get_indexer(df.index)
+            values[:, rows, j] = df[list(FIELDS)].to_numpy(dtype=dtype).T
+            valid[rows, j] = True
+        return cls(index, symbols, values, valid)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def field(self, name: str) -> np.ndarray:
+        """Return the ``(time, symbol)`` array for an OHLCV field."""
+        return self.values[FIELDS.index(name)]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.field("close")
+
+    def iloc(self, start: int, stop: int) -> "MarketPanel":
+        """Return a zero-copy view of rows ``start:stop``."""
+        return MarketPanel(
+            self.index[start:stop], self.symbols, self.values[:, start:stop], self.valid[start:stop]
+        )
+
+    def slice(self, start=None, end=None) -> "MarketPanel":
+        """Return a zero-copy view of bars with ``start <= ts < end``."""
+        lo = 0 if start is None else self.index.searchsorted(start, side="left")
+        hi = len(self.index) if end is None else self.index.searchsorted(end, side="left")
+        return self.iloc(lo, hi)
+
+    def common_span(self) -> tuple[pd.Timestamp, pd.Timestamp]:
+        """Return the latest first bar and earliest last bar across symbols."""
+        first = self.valid.argmax(axis=0)
+        last = len(self.index) - 1 - self.valid[::-1].argmax(axis=0)
+        return self.index[first.max()], self.index[last.min()]
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Return the OHLCV DataFrame for one symbol (its valid bars only)."""
+        j = self.symbols.index(symbol)
+        df = pd.DataFrame(self.values[:, :, j].T, index=self.index, columns=list(FIELDS), copy=False)
+        mask = self.valid[:, j]
+        return df if mask.all() else df[mask]
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        return {sym: self.frame(sym) for sym in self.symbols}
+
+    def fingerprint(self) -> str:
+        """Return a digest of the timestamps, symbols, prices and validity mask."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.index.asi8.tobytes())
+        h.update("\0".join(self.symbols).encode())
+        h.update(np.ascontiguousarray(self.values).tobytes())
+        h.update(np.ascontiguousarray(self.valid).tobytes())
+        return h.hexdigest()
+
+    def save(self, directory: str | Path) -> Path:
+        """Write the panel as ``.npy`` arrays plus a small JSON header under ``directory``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "index.npy", self.index.asi8)
+        np.save(directory / "values.npy", self.values)
+        np.save(directory / "valid.npy", self.valid)
+        tz = None if self.index.tz is None else str(self.index.tz)
+        (directory / "panel.json").write_text(json.dumps({"symbols": self.symbols, "tz": tz}))
+        return directory
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap_mode: str | None = "r") -> "MarketPanel":
+        """Read a panel written by :meth:`save`.
+
+        With the default ``mmap_mode`` the arrays are memory-mapped read-only,
+        so processes loading the same directory share one copy in the page cache.
+        """
+        directory = Path(directory)
+        meta = json.loads((directory / "panel.json").read_text())
+        index = pd.DatetimeIndex(np.load(directory / "index.npy").view("datetime64[ns]"), name="ts")
+        if meta["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+        return cls(
+            index,
+            meta["symbols"],
+            np.load(directory / "values.npy", mmap_mode=mmap_mode),
+            np.load(directory / "valid.npy", mmap_mode=mmap_mode),
+        )
+
+
+def as_panel(data) -> MarketPanel:
+    """Return ``data`` as a :class:`MarketPanel`, aligning frames if needed."""
+    if isinstance(data, MarketPanel):
+        return data
+    return MarketPanel.from_frames(data)
+
+
+__all__ = ["FIELDS", "MarketPanel", "as_panel"]
@@ -0,0 +1,105 @@
+"""Fixed-size ring buffer of the most recent OHLCV bars."""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class BarWindow:
+    """The last ``capacity`` bars of one symbol in preallocated arrays.
+
+    Every bar is written twice, at ``i`` and ``i + capacity``, so the window
+    is always one contiguous slice and :meth:`values` / :meth:`frame` are
+    views rather than copies. Pushing a bar with the newest timestamp
+    replaces the in-progress bar in place; a later timestamp appends in O(1),
+    overwriting the oldest bar once full. Views are invalidated by the next
+    write and must be treated as read-only.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.full((2 * capacity, len(COLUMNS)), np.nan)
+        self._pos = -1
+        self._size = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, capacity: Optional[int] = None) -> "BarWindow":
+        """Build a window holding the last ``capacity`` (default ``len(df)``) bars of ``df``."""
+        window = cls(capacity or len(df))
+        tail = df.iloc[-window.capacity:]
+        n = len(tail)
+        if n:
+            window._ts[:n] = window._ts[window.capacity:window.capacity + n] = tail.index.asi8
+            window._values[:n] = window._values[window.capacity:window.capacity + n] = tail[COLUMNS].to_numpy()
+            window._pos = n - 1
+            window._size = n
+        return window
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _slice(self) -> slice:
+        end = self._pos + self.capacity + 1
+        return slice(end - self._size, end)
+
+    @property
+    def last_ts(self) -> Optional[pd.Timestamp]:
+        if not self._size:
+            return None
+        return pd.Timestamp(int(self._ts[self._pos]), tz="UTC")
+
+    def _write(self, pos: int, ts: int, values: Sequence[float]) -> None:
+        self._ts[pos] = self._ts[pos + self.capacity] = ts
+        self._values[pos] = self._values[pos + self.capacity] = values
+
+    def push(self, ts: pd.Timestamp, values: Sequence[float]) -> bool:
+        """Add or replace the bar at ``ts`` with ``values`` in :data:`COLUMNS` order.
+
+        Returns True if a new bar was appended, False if the in-progress bar
+        was replaced. Bars older than the newest one raise ``ValueError``.
+        """
+        ts = pd.Timestamp(ts).value
+        if self._size and ts == self._ts[self._pos]:
+            self._write(self._pos, ts, values)
+            return False
+        if self._size and ts < self._ts[self._pos]:
+            raise ValueError(f"bar at {pd.Timestamp(ts, tz='UTC')} is older than the newest bar")
+        self._pos = (self._pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._write(self._pos, ts, values)
+        return True
+
+    def push_bar(self, bar: pd.Series) -> bool:
+        """:meth:`push` one OHLCV row named by its timestamp."""
+        return self.push(bar.name, bar[COLUMNS].to_numpy(dtype=float))
+
+    def update_price(self, price: float) -> None:
+        """Fold a trade price into the in-progress bar's high, low and close."""
+        if not self._size:
+            return
+        for pos in (self._pos, self._pos + self.capacity):
+            row = self._values[pos]
+            row[1] = max(row[1], price)
+            row[2] = min(row[2], price)
+            row[3] = price
+
+    def values(self) -> np.ndarray:
+        """``(len, 5)`` view of the bars, oldest first."""
+        return self._values[self._slice()]
+
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self._ts[self._slice()].view("M8[ns]"), name="ts").tz_localize("UTC")
+
+    def frame(self) -> pd.DataFrame:
+        """The bars as a DataFrame over a view of the buffer."""
+        return pd.DataFrame(self.values(), index=self.index(), columns=COLUMNS, copy=False)
+
+
+__all__ = ["BarWindow", "COLUMNS"]
@@ -0,0 +1,192 @@
+"""On-disk OHLCV bar store with incremental top-up from the exchange."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .async_feed import fetch_all
+from .feed import fetch_ohlcv_range, network_kwargs
+from ..utils import timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on ``path`` (created if needed)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as fh:
+        if os.name == "nt":
+            import msvcrt
+
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class BarStore:
+    """Parquet files of OHLCV bars partitioned as ``exchange=/symbol=/timeframe=``.
+
+    Files are replaced atomically, so readers never see a partial write;
+    writers serialise on a lock file next to each partition (needs pyarrow).
+    Next to the bars, ``meta.json`` records the time from which the
+    partition holds every bar the exchange has, so a symbol with a short
+    history still counts as complete.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def partition(self, exchange: str, symbol: str, timeframe: str) -> Path:
+        return self.root / f"exchange={exchange}" / f"symbol={symbol.replace('/', '-')}" / f"timeframe={timeframe}"
+
+    @contextmanager
+    def lock(self, exchange: str, symbol: str, timeframe: str) -> Iterator[None]:
+        with file_lock(self.partition(exchange, symbol, timeframe) / ".lock"):
+            yield
+
+    def read(self, exchange: str, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        path = self.partition(exchange, symbol, timeframe) / "bars.parquet"
+        return pd.read_parquet(path) if path.exists() else None
+
+    def covered_from(self, exchange: str, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        """Start of the range the partition holds completely, or None if unknown."""
+        path = self.partition(exchange, symbol, timeframe) / "meta.json"
+        if not path.exists():
+            return None
+        return pd.Timestamp(json.loads(path.read_text())["covered_from"])
+
+    def write(
+        self,
+        exchange: str,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        covered_from: Optional[pd.Timestamp] = None,
+    ) -> None:
+        partition = self.partition(exchange, symbol, timeframe)
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / "bars.parquet"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp)
+        os.replace(tmp, path)
+        if covered_from is not None:
+            # written after the bars, so it never claims more than they hold
+            meta = partition / f"meta.{os.getpid()}.tmp"
+            meta.write_text(json.dumps({"covered_from": covered_from.isoformat()}))
+            os.replace(meta, partition / "meta.json")
+
+    def age_seconds(self, exchange: str, symbol: str, timeframe: str) -> Optional[float]:
+        """Seconds since the partition was last written, or None if it does not exist."""
+        path = self.partition(exchange, symbol, timeframe) / "bars.parquet"
+        return time.time() - path.stat().st_mtime if path.exists() else None
+
+
+def load_ohlcv(
+    store: BarStore,
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    limit: int,
+    cache_minutes: int,
+    **network,
+) -> pd.DataFrame:
+    """Return the latest ``limit`` bars, served from ``store`` where possible.
+
+    The store is complete for the request when it holds ``limit`` bars or
+    was fetched from the start of the requested range, which covers
+    symbols with less history than ``limit``. Complete bars written within
+    ``cache_minutes`` are returned without touching the network. Otherwise
+    only the tail from the last stored bar onwards is fetched (the last bar
+    may have been in progress) and merged in; the whole range is fetched
+    when the store is incomplete.
+    ``network`` is passed through to :func:`fetch_ohlcv_range`.
+    """
+    step = pd.Timedelta(seconds=timeframe_to_seconds(timeframe))
+    now = pd.Timestamp.now(tz="UTC")
+    wanted = now - limit * step
+    with store.lock(exchange_name, symbol, timeframe):
+        cached = store.read(exchange_name, symbol, timeframe)
+        covered = store.covered_from(exchange_name, symbol, timeframe)
+        complete = cached is not None and (len(cached) >= limit or (covered is not None and covered <= wanted))
+        if complete and store.age_seconds(exchange_name, symbol, timeframe) < cache_minutes * 60:
+            return cached.iloc[-limit:]
+        start = cached.index[-1] if complete and len(cached) else wanted
+        fresh = fetch_ohlcv_range(exchange_name, symbol, timeframe, start, now + step, **network)
+        merged = fresh if cached is None else pd.concat([cached, fresh])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        store.write(exchange_name, symbol, timeframe, merged, covered if complete else wanted)
+        logger.info(
+            "bar store %s %s %s: %s cached, %s fetched",
+            exchange_name,
+            symbol,
+            timeframe,
+            0 if cached is None else len(cached),
+            len(fresh),
+        )
+        return merged.iloc[-limit:]
+
+
+def load_market_data(
+    cfg, symbols: Optional[List[str]] = None, limit: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """Load ``limit`` (default ``data.lookback_limit``) bars per symbol for the configured market.
+
+    Symbols are loaded concurrently, at most ``network.max_concurrency`` at
+    a time. With ``data.cache_minutes`` at 0 the bar store is bypassed and
+    every call downloads from the exchange, in one request per symbol when
+    ``limit`` fits in one page.
+    """
+    network = dict(network_kwargs(cfg), page_limit=cfg.data.page_limit, max_workers=cfg.data.fetch_workers)
+    symbols = symbols or cfg.symbols
+    limit = limit or cfg.data.lookback_limit
+    if cfg.data.cache_minutes <= 0 and limit <= cfg.data.page_limit:
+        return fetch_all(
+            cfg.exchange,
+            symbols,
+            cfg.timeframe,
+            limit,
+            concurrency=cfg.network.max_concurrency,
+            **network_kwargs(cfg),
+        )
+    if cfg.data.cache_minutes <= 0:
+        step = pd.Timedelta(seconds=timeframe_to_seconds(cfg.timeframe))
+        now = pd.Timestamp.now(tz="UTC")
+
+        def load(symbol: str) -> pd.DataFrame:
+            return fetch_ohlcv_range(
+                cfg.exchange, symbol, cfg.timeframe, now - limit * step, now + step, **network
+            ).iloc[-limit:]
+
+    else:
+        store = BarStore(cfg.data.cache_dir)
+
+        def load(symbol: str) -> pd.DataFrame:
+            return load_ohlcv(store, cfg.exchange, symbol, cfg.timeframe, limit, cfg.data.cache_minutes, **network)
+
+    # partitions are locked individually, and range fetches share one rate limiter
+    with ThreadPoolExecutor(max_workers=max(1, min(cfg.network.max_concurrency, len(symbols)))) as pool:
+        return dict(zip(symbols, pool.map(load, symbols)))
+
+
+__all__ = ["BarStore", "file_lock", "load_market_data", "load_ohlcv"]
@@ -0,0 +1,39 @@
+"""Batched evaluation of many strategy parameter sets."""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+import pandas as pd
+
+from ..core.backtest import run_backtest_batch
+from ..core.metrics import batch_metrics
+from ..data.panel import as_panel
+
+
+def evaluate_params(
+    df_by_symbol: Dict[str, pd.DataFrame],
+    strategy_cls,
+    params_list: Sequence[Dict],
+    cfg,
+    chunk_size: int = 256,
+) -> pd.DataFrame:
+    """Backtest and score every parameter set in ``params_list``.
+
+    Signals for a chunk of parameter sets are computed as one ``(time, set)``
+    matrix via ``strategy_cls.batch_signals`` and simulated together. Returns
+    one row per parameter set holding the parameters and the
+    :func:`compute_metrics` output, scored for the whole chunk at once with
+    :func:`batch_metrics`.
+    """
+    panel = as_panel(df_by_symbol)
+    frames: List[pd.DataFrame] = []
+    for start in range(0, len(params_list), chunk_size):
+        chunk = list(params_list[start:start + chunk_size])
+        signals = {sym: strategy_cls.batch_signals(panel.frame(sym), chunk) for sym in panel.symbols}
+        equity, trades = run_backtest_batch(panel, signals, cfg)
+        metrics = batch_metrics(equity.to_numpy(), cfg.timeframe, trades)
+        frames.append(pd.concat([pd.DataFrame(chunk), metrics], axis=1))
+    return pd.concat(frames, ignore_index=True)
+
+
+__all__ = ["evaluate_params"]
@@ -0,0 +1,86 @@
+"""Persistent memo of tuning trial objectives."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..storage.db import get_session
+from ..storage.models import TrialResult
+
+logger = logging.getLogger(__name__)
+
+# bump when the objective or the simulation changes so stale results are ignored
+MEMO_VERSION = 1
+
+
+def _params_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True, default=lambda v: v.item())
+
+
+def context_key(strategy_name: str, panel, cfg) -> str:
+    """Digest of everything besides the parameters that a trial's objective depends on."""
+    context = [
+        MEMO_VERSION,
+        strategy_name,
+        panel.fingerprint(),
+        cfg.timeframe,
+        cfg.paper.starting_balance_eur,
+        cfg.paper.fee_bps,
+        cfg.paper.slippage_bps,
+        cfg.risk.max_position_fraction,
+    ]
+    return hashlib.blake2b(json.dumps(context).encode(), digest_size=16).hexdigest()
+
+
+class TrialMemo:
+    """Objective values of finished trials for one strategy, dataset and cost setting.
+
+    Entries are stored in the ``trial_results`` table so later runs and
+    walk-forward windows on the same data reuse them. All entries for the
+    context are loaded up front, so lookups never touch the database.
+    """
+
+    def __init__(self, strategy_name: str, panel, cfg) -> None:
+        self.strategy_name = strategy_name
+        self.context = context_key(strategy_name, panel, cfg)
+        self.hits = 0
+        self.misses = 0
+        with get_session() as session:
+            rows = session.execute(
+                select(TrialResult.params_json, TrialResult.objective).where(TrialResult.context == self.context)
+            ).all()
+        self._values: Dict[str, float] = {key: value for key, value in rows if value is not None}
+
+    def get(self, params: Dict) -> Optional[float]:
+        value = self._values.get(_params_key(params))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, params: Dict, value: float) -> None:
+        key = _params_key(params)
+        if key in self._values:
+            return
+        self._values[key] = value
+        with get_session() as session:
+            session.add(
+                TrialResult(context=self.context, strategy=self.strategy_name, params_json=key, objective=value)
+            )
+            try:
+                session.commit()
+            except IntegrityError:
+                # another worker stored the same trial first
+                session.rollback()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._values)}
+
+
+__all__ = ["MEMO_VERSION", "TrialMemo", "context_key"]
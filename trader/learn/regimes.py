@@ -3,13 +3,15 @@ from __future__ import annotations
 
 import pandas as pd
 
+from ..strategies.indicators import rolling_mean
+
 
 def detect_regimes(df: pd.DataFrame) -> pd.DataFrame:
     """Return DataFrame with boolean trend/range regime columns."""
     close = df["close"]
-    sma200 = close.rolling(200).mean()
+    sma200 = rolling_mean(close, 200)
     slope = sma200.diff()
-    tr = (df["high"] - df["low"]).rolling(14).mean()
+    tr = rolling_mean(df["high"] - df["low"], 14)
     atr_ratio = (tr / close).fillna(0)
     trend = slope > 0
     range_ = (atr_ratio < 0.02) & (slope.abs() < 1e-3)
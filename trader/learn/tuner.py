@@ -1,13 +1,26 @@
 """Parameter tuning using Optuna."""
 from __future__ import annotations
 
+import itertools
 import json
-from typing import Dict
+import logging
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
 
+import numpy as np
 import optuna
+import pandas as pd
+from optuna.trial import TrialState
 
-from ..core.backtest import run_backtest
-from ..core.metrics import compute_metrics
+from .batch import evaluate_params
+from .memo import TrialMemo
+from ..core.backtest import Book, run_backtest, simulate
+from ..core.metrics import OnlineMetrics, compute_metrics
+from ..data.panel import MarketPanel, as_panel
+from ..strategies.indicators import CACHE
 from ..strategies.sma_cross import SMACross
 from ..strategies.rsi_reversion import RSIReversion
 
@@ -16,28 +29,337 @@ STRATEGIES = {
     "rsi_reversion": RSIReversion,
 }
 
+logger = logging.getLogger(__name__)
 
-def tune(df_by_symbol, strategy_name: str, cfg) -> Dict[str, float]:
+
+def suggest_params(trial: optuna.Trial, strategy_name: str) -> Dict[str, int]:
+    """Sample a parameter set for ``strategy_name`` from the search space."""
+    if strategy_name == "sma_cross":
+        fast = trial.suggest_int("fast", 5, 50)
+        slow = trial.suggest_int("slow", fast + 10, 200)
+        return {"fast": fast, "slow": slow}
+    period = trial.suggest_int("period", 5, 50)
+    buy_th = trial.suggest_int("buy_th", 10, 40)
+    sell_th = trial.suggest_int("sell_th", 60, 90)
+    return {"period": period, "buy_th": buy_th, "sell_th": sell_th}
+
+
+def param_grid(strategy_name: str) -> List[Dict[str, int]]:
+    """Enumerate every parameter set of the search space in :func:`suggest_params`."""
+    if strategy_name == "sma_cross":
+        return [{"fast": f, "slow": s} for f in range(5, 51) for s in range(f + 10, 201)]
+    return [
+        {"period": p, "buy_th": b, "sell_th": s}
+        for p, b, s in itertools.product(range(5, 51), range(10, 41), range(60, 91))
+    ]
+
+
+def objective_value(metrics: Dict[str, float]) -> float:
+    """Tuning objective; also works column-wise on a metrics table."""
+    return metrics["CAGR"] + metrics["MaxDrawdown"]
+
+
+def grid_search(df_by_symbol, strategy_name: str, cfg) -> pd.DataFrame:
+    """Score the full parameter grid with batched backtests."""
+    grid = param_grid(strategy_name)
+    results = evaluate_params(
+        df_by_symbol, STRATEGIES[strategy_name], grid, cfg, chunk_size=cfg.tuning.chunk_size
+    )
+    results["objective"] = objective_value(results)
+    logger.info("grid search scored %s parameter sets", len(results))
+    return results
+
+
+def make_pruner(cfg) -> optuna.pruners.BasePruner:
+    """Return the Optuna pruner selected by ``tuning.pruner``."""
+    name = cfg.tuning.pruner
+    if name == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+    if name == "halving":
+        return optuna.pruners.SuccessiveHalvingPruner()
+    if name == "hyperband":
+        return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=cfg.tuning.report_steps)
+    return optuna.pruners.NopPruner()
+
+
+def _objective(panel, strategy_name: str, cfg, memo: TrialMemo | None = None):
     StrategyCls = STRATEGIES[strategy_name]
 
     def objective(trial: optuna.Trial) -> float:
-        if strategy_name == "sma_cross":
-            fast = trial.suggest_int("fast", 5, 50)
-            slow = trial.suggest_int("slow", fast + 10, 200)
-            strat = StrategyCls(fast=fast, slow=slow)
-        else:
-            period = trial.suggest_int("period", 5, 50)
-            buy_th = trial.suggest_int("buy_th", 10, 40)
-            sell_th = trial.suggest_int("sell_th", 60, 90)
-            strat = StrategyCls(period=period, buy_th=buy_th, sell_th=sell_th)
-        equity, trades = run_backtest(df_by_symbol, strat, cfg)
+        strat = StrategyCls(**suggest_params(trial, strategy_name))
+        equity, trades = run_backtest(panel, strat, cfg)
         metrics = compute_metrics(equity["equity"], trades, cfg.timeframe)
-        objective_value = metrics["CAGR"] + metrics["MaxDrawdown"]
-        return objective_value
+        return objective_value(metrics)
+
+    def chunked(trial: optuna.Trial) -> float:
+        # simulate in tuning.report_steps chunks, reporting the running objective after each
+        strat = StrategyCls(**suggest_params(trial, strategy_name))
+        sig = strat.panel_signals(panel)
+        book = Book.start(cfg.paper.starting_balance_eur, len(panel.symbols))
+        metrics = OnlineMetrics(cfg.timeframe)
+        bounds = np.linspace(0, len(panel), cfg.tuning.report_steps + 1).astype(int)
+        for step, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if start == stop:
+                continue
+            equity, trades = simulate(panel.iloc(start, stop), sig[start:stop], cfg, book)
+            metrics.update_many(equity["equity"].to_numpy())
+            metrics.add_trades(trades)
+            value = objective_value(metrics.metrics())
+            if stop < len(panel):
+                trial.report(value, step)
+                if trial.should_prune():
+                    trial.set_user_attr("fraction", stop / len(panel))
+                    raise optuna.TrialPruned()
+        return value
+
+    run = objective if cfg.tuning.pruner == "none" else chunked
+    if memo is None:
+        return run
+
+    def memoised(trial: optuna.Trial) -> float:
+        params = suggest_params(trial, strategy_name)
+        value = memo.get(params)
+        if value is not None:
+            trial.set_user_attr("memo", True)
+            return value
+        value = run(trial)
+        memo.put(params, value)
+        return value
+
+    return memoised
+
+
+def _log_pruning(study: optuna.Study, first: int) -> None:
+    """Log completed/pruned counts and the estimated time saved for trials from number ``first``."""
+    trials = [t for t in study.get_trials(deepcopy=False) if t.number >= first]
+    done = [t.duration.total_seconds() for t in trials if t.state == TrialState.COMPLETE]
+    pruned = [t for t in trials if t.state == TrialState.PRUNED]
+    full = sum(done) / len(done) if done else 0.0
+    saved = sum(full * (1 - t.user_attrs.get("fraction", 0.0)) for t in pruned)
+    logger.info(
+        "study %s: %s completed, %s pruned, ~%.1fs saved", study.study_name, len(done), len(pruned), saved
+    )
+
+
+def _run_trials(
+    study: optuna.Study, panel, strategy_name: str, cfg, n_trials: int, memo: TrialMemo | None = None
+) -> None:
+    """Run ``n_trials`` trials of ``study`` in the calling thread."""
+    if cfg.tuning.batch_size > 1:
+        StrategyCls = STRATEGIES[strategy_name]
+        remaining = n_trials
+        while remaining > 0:
+            trials = [study.ask() for _ in range(min(cfg.tuning.batch_size, remaining))]
+            params = [suggest_params(t, strategy_name) for t in trials]
+            values = [memo.get(p) if memo else None for p in params]
+            todo = [i for i, value in enumerate(values) if value is None]
+            if todo:
+                results = evaluate_params(panel, StrategyCls, [params[i] for i in todo], cfg)
+                for i, (_, row) in zip(todo, results.iterrows()):
+                    values[i] = objective_value(row)
+                    if memo:
+                        memo.put(params[i], values[i])
+            for trial, value in zip(trials, values):
+                study.tell(trial, value)
+            remaining -= len(trials)
+    else:
+        study.optimize(_objective(panel, strategy_name, cfg, memo), n_trials=n_trials)
+
+
+def _journal(path: str | Path) -> optuna.storages.JournalStorage:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return optuna.storages.JournalStorage(optuna.storages.journal.JournalFileBackend(str(path)))
+
+
+def open_storage(spec: str | None):
+    """Return an Optuna storage for ``spec``: None (in memory), a database URL or a journal file path."""
+    if spec is None or "://" in spec:
+        return spec
+    return _journal(spec)
+
+
+def study_name(strategy_name: str, cfg, panel) -> str:
+    """Deterministic study name per strategy, market, timeframe and data.
+
+    The suffix holds the last and first bar times and the panel's
+    fingerprint, so a rerun on different data never resumes a finished study,
+    and names of the same market sort by their last bar.
+    """
+    base = f"{strategy_name}:{cfg.exchange}:{','.join(panel.symbols)}:{cfg.timeframe}"
+    return f"{base}:{panel.index[-1]:%Y%m%dT%H%M}-{panel.index[0]:%Y%m%dT%H%M}-{panel.fingerprint()}"
+
+
+def _warm_start(study: optuna.Study, storage, cfg) -> None:
+    """Enqueue the best trials of the latest earlier study for the same market."""
+    base = study.study_name.rsplit(":", 1)[0] + ":"
+    earlier = [
+        name for name in optuna.study.get_all_study_names(storage)
+        if name.startswith(base) and name < study.study_name
+    ]
+    if not earlier or cfg.tuning.warm_start_top_k == 0:
+        return
+    previous = optuna.load_study(study_name=max(earlier), storage=storage)
+    done = previous.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+    done.sort(key=lambda t: t.value, reverse=cfg.tuning.direction == "maximize")
+    seeds = done[:cfg.tuning.warm_start_top_k]
+    for trial in seeds:
+        study.enqueue_trial(trial.params)
+    logger.info("seeded study %s with %s trials from %s", study.study_name, len(seeds), previous.study_name)
+
+
+def open_study(
+    panel, strategy_name: str, cfg, storage=None, seed_params: Sequence[Dict] = (), warm_start: bool = True
+) -> optuna.Study:
+    """Create the study for ``panel``, or resume it if ``storage`` already holds it.
+
+    A new study first tries ``seed_params``; with ``warm_start``, a new
+    persistent one is also seeded with the top ``tuning.warm_start_top_k``
+    trials of the previous study for the same strategy and market.
+    """
+    study = optuna.create_study(
+        study_name=study_name(strategy_name, cfg, panel),
+        storage=storage,
+        direction=cfg.tuning.direction,
+        pruner=make_pruner(cfg),
+        load_if_exists=True,
+    )
+    if not study.trials:
+        for params in seed_params:
+            study.enqueue_trial(params)
+        if storage is not None and warm_start:
+            _warm_start(study, storage, cfg)
+    return study
+
+
+def _memo(panel, strategy_name: str, cfg) -> TrialMemo | None:
+    return TrialMemo(strategy_name, panel, cfg) if cfg.tuning.memo else None
+
+
+def _log_caches(cache: Dict[str, int], memo: Dict[str, int] | None) -> None:
+    logger.info("indicator cache %s", cache)
+    if memo is not None:
+        logger.info("trial memo %s", memo)
+
+
+def _worker(panel_dir: str, storage_spec: str, name: str, strategy_name: str, cfg, n_trials: int) -> tuple:
+    """Process entry point: memory-map the panel and add trials to the shared study."""
+    panel = MarketPanel.load(panel_dir)
+    study = optuna.load_study(study_name=name, storage=open_storage(storage_spec), pruner=make_pruner(cfg))
+    memo = _memo(panel, strategy_name, cfg)
+    _run_trials(study, panel, strategy_name, cfg, n_trials, memo)
+    return CACHE.stats(), memo.stats() if memo else None
+
+
+def _shares(n_trials: int, n_jobs: int) -> List[int]:
+    """Split ``n_trials`` as evenly as possible over ``n_jobs`` workers."""
+    base, extra = divmod(n_trials, n_jobs)
+    return [base + (i < extra) for i in range(n_jobs) if base + (i < extra)]
+
+
+def _optimize_parallel(
+    study: optuna.Study,
+    panel,
+    strategy_name: str,
+    cfg,
+    n_trials: int,
+    storage_spec: str | None,
+    tmp: str,
+    memo: TrialMemo | None,
+) -> None:
+    """Run ``n_trials`` trials of ``study`` on ``tuning.n_jobs`` workers.
+
+    Threads share ``study`` directly. Processes reopen it from
+    ``storage_spec``, memory-map the panel saved once under ``tmp`` (so the
+    OHLCV arrays are never pickled per worker) and load their own ``memo``.
+    """
+    shares = _shares(n_trials, cfg.tuning.n_jobs)
+    if cfg.tuning.backend == "thread":
+        with ThreadPoolExecutor(max_workers=len(shares)) as pool:
+            futures = [pool.submit(_run_trials, study, panel, strategy_name, cfg, n, memo) for n in shares]
+            for future in futures:
+                future.result()
+        _log_caches(CACHE.stats(), memo.stats() if memo else None)
+        return
+
+    panel_dir = panel.save(Path(tmp) / "panel")
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shares), mp_context=context) as pool:
+        futures = [
+            pool.submit(_worker, str(panel_dir), storage_spec, study.study_name, strategy_name, cfg, n)
+            for n in shares
+        ]
+        stats = [future.result() for future in futures]
+    caches, memos = zip(*stats)
+    _log_caches(
+        {key: sum(s[key] for s in caches) for key in caches[0]},
+        {key: sum(s[key] for s in memos) for key in ("hits", "misses")} if memo else None,
+    )
+
+
+def tune_best(
+    df_by_symbol, strategy_name: str, cfg, seed_params: Sequence[Dict] = (), warm_start: bool = True
+) -> Tuple[Dict[str, float], float]:
+    """Return the best parameters found for ``strategy_name`` on the data and their objective.
+
+    ``seed_params`` (e.g. the previous walk-forward window's best) are tried
+    first when a new Optuna study is created; ``warm_start`` is passed to
+    :func:`open_study`.
+    """
+    df_by_symbol = as_panel(df_by_symbol)
+
+    if cfg.tuning.mode == "grid":
+        results = grid_search(df_by_symbol, strategy_name, cfg)
+        logger.info("indicator cache %s", CACHE.stats())
+        objective = results["objective"]
+        best = objective.idxmax() if cfg.tuning.direction == "maximize" else objective.idxmin()
+        params = {k: int(results.at[best, k]) for k in param_grid(strategy_name)[0]}
+        return params, float(objective[best])
+
+    with tempfile.TemporaryDirectory(prefix="tune-") as tmp:
+        spec = cfg.tuning.storage
+        if spec is None and cfg.tuning.n_jobs > 1 and cfg.tuning.backend == "process":
+            # worker processes need a storage they can all open
+            spec = str(Path(tmp) / "study.log")
+        study = open_study(df_by_symbol, strategy_name, cfg, open_storage(spec), seed_params, warm_start)
+        memo = _memo(df_by_symbol, strategy_name, cfg)
+        first = sum(t.state != TrialState.WAITING for t in study.trials)
+        finished = sum(t.state.is_finished() for t in study.trials)
+        remaining = max(cfg.tuning.n_trials - finished, 0)
+        if finished:
+            logger.info("resuming study %s: %s trials done, %s to go", study.study_name, finished, remaining)
+        if remaining and cfg.tuning.n_jobs > 1:
+            # run enqueued seeds here: workers could pop the same waiting trial
+            seeds = min(len(study.get_trials(deepcopy=False, states=(TrialState.WAITING,))), remaining)
+            _run_trials(study, df_by_symbol, strategy_name, cfg, seeds, memo)
+            remaining -= seeds
+        if remaining and cfg.tuning.n_jobs > 1:
+            logger.info(
+                "tuning %s trials on %s %s workers", remaining, cfg.tuning.n_jobs, cfg.tuning.backend
+            )
+            _optimize_parallel(study, df_by_symbol, strategy_name, cfg, remaining, spec, tmp, memo)
+        elif remaining:
+            _run_trials(study, df_by_symbol, strategy_name, cfg, remaining, memo)
+            _log_caches(CACHE.stats(), memo.stats() if memo else None)
+        if cfg.tuning.pruner != "none":
+            _log_pruning(study, first)
+        return study.best_params, study.best_value
+
 
-    study = optuna.create_study(direction=cfg.tuning.direction)
-    study.optimize(objective, n_trials=cfg.tuning.n_trials)
-    return study.best_params
+def tune(df_by_symbol, strategy_name: str, cfg, seed_params: Sequence[Dict] = ()) -> Dict[str, float]:
+    """Return the best parameters found for ``strategy_name`` on the data, as :func:`tune_best`."""
+    return tune_best(df_by_symbol, strategy_name, cfg, seed_params)[0]
 
 
-__all__ = ["tune"]
+__all__ = [
+    "STRATEGIES",
+    "grid_search",
+    "make_pruner",
+    "objective_value",
+    "open_storage",
+    "open_study",
+    "param_grid",
+    "study_name",
+    "suggest_params",
+    "tune",
+    "tune_best",
+]
@@ -1,47 +1,302 @@
 """Walk-forward optimization."""
 from __future__ import annotations
 
-from datetime import timedelta
-from typing import Dict, List
+import hashlib
+import json
+import logging
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
 
 import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
-from .tuner import tune, STRATEGIES
+from .memo import context_key
+from .tuner import STRATEGIES, study_name, tune_best
 from ..core.backtest import run_backtest
+from ..data.panel import MarketPanel, as_panel
+from ..storage.db import get_session
+from ..storage.models import WalkForwardWindow
 
+logger = logging.getLogger(__name__)
 
-TRAIN_DAYS = 180
-TEST_DAYS = 30
+
+@dataclass(frozen=True)
+class Window:
+    """Train/test bounds of one walk-forward window, as timestamps and panel rows."""
+
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_end: pd.Timestamp
+    lo: int
+    mid: int
+    hi: int
+
+
+@dataclass
+class WindowResult:
+    params: Dict
+    equity: pd.Series
+    summary: Dict = field(default_factory=dict)
+
+
+def windows(panel: MarketPanel, cfg) -> List[Window]:
+    """Return every full window of the ``walkforward`` config inside the panel's common span.
+
+    Rolling windows start on a grid of ``step_days`` from the Unix epoch, so a
+    rerun on history that starts later still produces the same windows; the
+    history before the first grid point is logged and skipped, unless that
+    leaves no full window, in which case they start at the span's start.
+    Anchored windows all train from the start of the span.
+    """
+    wf = cfg.walkforward
+    step = pd.Timedelta(days=wf.step_days or wf.train_days)
+    start, end = panel.common_span()
+    if wf.mode == "anchored":
+        return _windows_from(panel, cfg, start, end)
+    epoch = pd.Timestamp(0, tz=start.tz)
+    aligned = epoch + -((start - epoch) // -step) * step
+    out = _windows_from(panel, cfg, aligned, end)
+    if not out and aligned > start:
+        out = _windows_from(panel, cfg, start, end)
+        if out:
+            logger.warning("no walk-forward window fits the %s-day grid; starting at %s instead", step.days, start)
+        return out
+    if aligned > start:
+        logger.info(
+            "walk-forward skips %.1f days before %s to align windows to the %s-day grid",
+            (aligned - start) / pd.Timedelta(days=1),
+            aligned,
+            step.days,
+        )
+    return out
+
+
+def _windows_from(panel: MarketPanel, cfg, start: pd.Timestamp, end: pd.Timestamp) -> List[Window]:
+    wf = cfg.walkforward
+    train = pd.Timedelta(days=wf.train_days)
+    test = pd.Timedelta(days=wf.test_days)
+    step = pd.Timedelta(days=wf.step_days or wf.train_days)
+    out: List[Window] = []
+    k = 0
+    while True:
+        train_start = start if wf.mode == "anchored" else start + k * step
+        train_end = start + train + k * step
+        test_end = train_end + test
+        if test_end > end:
+            return out
+        lo, mid, hi = panel.index.searchsorted([train_start, train_end, test_end], side="left")
+        out.append(Window(train_start, train_end, test_end, int(lo), int(mid), int(hi)))
+        k += 1
+
+
+def evaluate_window(
+    panel: MarketPanel, strategy_name: str, cfg, window: Window, seed_params: Sequence[Dict] = ()
+) -> WindowResult:
+    """Tune on the train rows of ``window`` and backtest the chosen params on its test rows."""
+    train = panel.iloc(window.lo, window.mid)
+    # the study is seeded by ``seed_params`` only, which the checkpoint key covers
+    params, train_objective = tune_best(train, strategy_name, cfg, seed_params, warm_start=False)
+    strat = STRATEGIES[strategy_name](**params)
+    equity_df, _ = run_backtest(panel.iloc(window.mid, window.hi), strat, cfg)
+    summary = {
+        "mode": cfg.tuning.mode,
+        "n_trials": cfg.tuning.n_trials,
+        "study": study_name(strategy_name, cfg, train),
+        "train_objective": train_objective,
+        "seeded": bool(seed_params),
+    }
+    return WindowResult(params, equity_df["equity"], summary)
+
+
+def _checkpoint_key(
+    panel: MarketPanel, strategy_name: str, cfg, window: Window, seed_params: Sequence[Dict]
+) -> str:
+    """Digest of the window's data, bounds, cost context, tuning settings and seed params."""
+    tuning = cfg.tuning.dict(include={"mode", "n_trials", "direction", "batch_size", "pruner", "report_steps"})
+    parts = [
+        context_key(strategy_name, panel.iloc(window.lo, window.hi), cfg),
+        str(window.train_start),
+        str(window.train_end),
+        str(window.test_end),
+        tuning,
+        list(seed_params),
+    ]
+    encoded = json.dumps(parts, sort_keys=True, default=lambda v: v.item()).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _load_checkpoints(keys: List[str]) -> Dict[str, WindowResult]:
+    with get_session() as session:
+        rows = session.execute(select(WalkForwardWindow).where(WalkForwardWindow.key.in_(keys))).scalars().all()
+    out = {}
+    for row in rows:
+        equity = json.loads(row.equity_json)
+        index = pd.to_datetime(equity["ts"], utc=True).rename("ts")
+        out[row.key] = WindowResult(
+            json.loads(row.params_json),
+            pd.Series(equity["equity"], index=index, name="equity"),
+            json.loads(row.summary_json),
+        )
+    return out
+
+
+def _save_checkpoint(key: str, strategy_name: str, window: Window, result: WindowResult) -> None:
+    equity = {"ts": result.equity.index.asi8.tolist(), "equity": result.equity.tolist()}
+    with get_session() as session:
+        session.add(
+            WalkForwardWindow(
+                key=key,
+                strategy=strategy_name,
+                train_start=window.train_start.to_pydatetime(),
+                train_end=window.train_end.to_pydatetime(),
+                test_end=window.test_end.to_pydatetime(),
+                params_json=json.dumps(result.params, default=lambda v: v.item()),
+                equity_json=json.dumps(equity),
+                summary_json=json.dumps(result.summary),
+            )
+        )
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+
+
+def _window_worker(
+    panel_dir: str, strategy_name: str, cfg, window: Window, seed_params: Sequence[Dict], started: str
+) -> WindowResult:
+    Path(started).touch()
+    return evaluate_window(MarketPanel.load(panel_dir), strategy_name, cfg, window, seed_params)
+
+
+def _evaluate_parallel(
+    panel: MarketPanel, strategy_name: str, cfg, jobs: Dict[int, Tuple[Window, Sequence[Dict]]], on_done
+) -> None:
+    """Evaluate windows on ``walkforward.n_jobs`` processes, resubmitting only unfinished ones.
+
+    ``on_done(i, result)`` is called as each window finishes. A crashed
+    worker breaks the whole pool without telling which window it ran, so the
+    windows that had started (each worker touches a marker file first) are
+    rerun one at a time in a pool of their own, where a crash is their own;
+    windows that never started go back to a full pool. Windows that already
+    finished are kept. A window whose own call fails more than
+    ``walkforward.max_retries`` times raises.
+    """
+    # windows already run in parallel; keep each tune in its own process
+    cfg = cfg.copy(deep=True)
+    cfg.tuning.n_jobs = 1
+    done = set()
+    failures: Dict[int, int] = {}
+    suspects = set()
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="wfo-") as tmp:
+        panel_dir = str(panel.save(Path(tmp) / "panel"))
+        markers = Path(tmp) / "started"
+        markers.mkdir()
+        while len(done) < len(jobs):
+            pending = [i for i in jobs if i not in done]
+            isolated = [i for i in pending if i in suspects][:1]
+            batch = isolated or pending
+            workers = min(cfg.walkforward.n_jobs, len(batch))
+            for i in batch:
+                (markers / str(i)).unlink(missing_ok=True)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {
+                    pool.submit(_window_worker, panel_dir, strategy_name, cfg, *jobs[i], str(markers / str(i))): i
+                    for i in batch
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as exc:
+                        if not isolated:
+                            if (markers / str(i)).exists():
+                                suspects.add(i)
+                            continue
+                        failed = exc
+                    except Exception as exc:
+                        failed = exc
+                    else:
+                        suspects.discard(i)
+                        done.add(i)
+                        on_done(i, result)
+                        continue
+                    failures[i] = failures.get(i, 0) + 1
+                    if failures[i] > cfg.walkforward.max_retries:
+                        raise failed
+                    logger.warning("window %s failed (%s); retrying", jobs[i][0].train_start, failed)
 
 
 def walk_forward(df_by_symbol, strategy_name: str, cfg):
-    """Run walk-forward optimization."""
-    StrategyCls = STRATEGIES[strategy_name]
-    start = max(df.index[0] for df in df_by_symbol.values())
-    end = min(df.index[-1] for df in df_by_symbol.values())
+    """Run walk-forward optimization.
+
+    Finished windows are checkpointed in the database keyed by their data,
+    bounds, settings and seed params, so a rerun only computes new windows.
+    A window's study is seeded with the best params of the previous window
+    if an earlier run checkpointed it, e.g. the newest window of a nightly
+    rerun; a checkpoint computed unseeded is reused as is. Windows computed in
+    the same run are never chained, so results do not depend on
+    ``walkforward.n_jobs``.
+    """
+    panel = as_panel(df_by_symbol)
+    todo = windows(panel, cfg)
+    if not todo:
+        start, end = panel.common_span()
+        raise ValueError(
+            f"walk-forward needs {cfg.walkforward.train_days + cfg.walkforward.test_days} days of history, "
+            f"got {(end - start) / pd.Timedelta(days=1):.1f}"
+        )
+    results: Dict[int, WindowResult] = {}
+    seeds: Dict[int, List[Dict]] = {}
+    keys: Dict[int, str] = {}
+    for i, window in enumerate(todo):
+        # seeds come from checkpoints only, so they are fixed before anything runs
+        previous = results.get(i - 1)
+        seeds[i] = [previous.params] if previous is not None else []
+        keys[i] = _checkpoint_key(panel, strategy_name, cfg, window, seeds[i])
+        if cfg.walkforward.checkpoint:
+            # a window first computed before its predecessor was checkpointed ran unseeded
+            candidates = [keys[i]] + ([_checkpoint_key(panel, strategy_name, cfg, window, [])] if seeds[i] else [])
+            stored = _load_checkpoints(candidates)
+            found = next((key for key in candidates if key in stored), None)
+            if found is not None:
+                results[i] = stored[found]
+    logger.info(
+        "walk-forward over %s windows (%s checkpointed) on %s workers",
+        len(todo),
+        len(results),
+        cfg.walkforward.n_jobs,
+    )
+
+    def finish(i: int, result: WindowResult) -> None:
+        results[i] = result
+        if cfg.walkforward.checkpoint:
+            _save_checkpoint(keys[i], strategy_name, todo[i], result)
+
+    missing = [i for i in range(len(todo)) if i not in results]
+    if cfg.walkforward.n_jobs > 1 and len(missing) > 1:
+        _evaluate_parallel(panel, strategy_name, cfg, {i: (todo[i], seeds[i]) for i in missing}, finish)
+    else:
+        for i in missing:
+            finish(i, evaluate_window(panel, strategy_name, cfg, todo[i], seeds[i]))
+
     equity_curves: List[pd.Series] = []
     current_equity = cfg.paper.starting_balance_eur
     best_params = None
-
-    window_start = start
-    while True:
-        train_end = window_start + timedelta(days=TRAIN_DAYS)
-        test_end = train_end + timedelta(days=TEST_DAYS)
-        if test_end > end:
-            break
-        train_data = {s: df[(df.index >= window_start) & (df.index < train_end)] for s, df in df_by_symbol.items()}
-        test_data = {s: df[(df.index >= train_end) & (df.index < test_end)] for s, df in df_by_symbol.items()}
-        best_params = tune(train_data, strategy_name, cfg)
-        strat = StrategyCls(**best_params)
-        equity_df, _ = run_backtest(test_data, strat, cfg)
-        rel = equity_df["equity"] / equity_df["equity"].iloc[0]
-        scaled = rel * current_equity
+    for i in range(len(todo)):
+        best_params, equity = results[i].params, results[i].equity
+        scaled = equity / equity.iloc[0] * current_equity
         current_equity = scaled.iloc[-1]
         equity_curves.append(scaled)
-        window_start = train_end
 
     oos_equity = pd.concat(equity_curves)
     return oos_equity.to_frame("equity"), best_params
 
 
-__all__ = ["walk_forward"]
+__all__ = ["Window", "WindowResult", "evaluate_window", "walk_forward", "windows"]
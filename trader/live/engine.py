@@ -0,0 +1,286 @@
+"""Asyncio paper trading engine running many accounts on one market data feed."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .scheduler import BarCloseScheduler
+from ..core.broker import PaperBroker
+from ..core.metrics import OnlineMetrics
+from ..core.portfolio import equal_weight_targets
+from ..core.risk import DailyRiskManager
+from ..data.async_feed import AsyncFeed
+from ..data.clients import CLIENTS
+from ..data.feed import network_kwargs, poll_latest_all
+from ..data.ringbuffer import BarWindow
+from ..storage.db import get_session
+from ..storage.models import AccountSnapshot, Run, RunType, StrategyVersion, Trade
+from ..storage.writer import RowWriter
+from ..strategies.rsi_reversion import RSIReversion
+from ..strategies.sma_cross import SMACross
+from ..utils import timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+STRATS = {"sma_cross": SMACross, "rsi_reversion": RSIReversion}
+
+
+class Account:
+    """One paper account: a strategy and params trading its own broker and risk limits."""
+
+    def __init__(self, name: str, strategy_name: str, params: Dict, symbols: Sequence[str], cfg, balance=None):
+        self.name = name
+        self.strategy_name = strategy_name
+        self.params = params
+        self.symbols = list(symbols)
+        self.max_position_fraction = cfg.risk.max_position_fraction
+        self.broker = PaperBroker(
+            starting_eur=cfg.paper.starting_balance_eur if balance is None else balance,
+            fee_bps=cfg.paper.fee_bps,
+            slippage_bps=cfg.paper.slippage_bps,
+        )
+        self.risk = DailyRiskManager(cfg.risk.max_daily_loss_fraction)
+        self.metrics = OnlineMetrics(cfg.timeframe)
+        # one incremental instance per symbol, so each new bar costs O(1)
+        self.strategies = {s: STRATS[strategy_name](**params) for s in self.symbols}
+        self.signals: Dict[str, int] = {}
+        self.prev_sig: Dict[str, int] = {}
+        self.run_id: Optional[int] = None
+        self.saved_trades = 0  # high-water mark into the broker's fills
+
+    def warmup(self, closed: Dict[str, pd.DataFrame]) -> None:
+        for sym in self.symbols:
+            self.signals[sym] = int(self.strategies[sym].warmup(closed[sym]).iloc[-1])
+        self.prev_sig = dict(self.signals)
+
+    def on_bar(self, sym: str, bar: pd.Series) -> None:
+        self.signals[sym] = self.strategies[sym].on_bar(bar)
+
+    def rebalance(self, prices: Dict[str, float]) -> None:
+        """Trade on signal changes since the previous bar."""
+        for sym in self.symbols:
+            sig = self.signals[sym]
+            if self.prev_sig[sym] == 0 and sig == 1 and self.risk.allow_trading():
+                targets = equal_weight_targets(self.signals, self.max_position_fraction)
+                self.broker.buy_pct(sym, prices[sym], targets[sym])
+            elif self.prev_sig[sym] == 1 and sig == 0:
+                self.broker.sell_all(sym, prices[sym])
+            self.prev_sig[sym] = sig
+
+    def mark(self, ts: pd.Timestamp, prices: Dict[str, float], bar_closed: bool) -> Tuple[Dict, List[Dict]]:
+        """Mark to market, update risk and metrics, and return the snapshot and new trade rows."""
+        self.broker.mark_to_market(ts, prices)
+        snap = self.broker.last_snapshot()
+        self.risk.update(ts.to_pydatetime(), snap["equity"])
+        if bar_closed:
+            # per-bar returns, so intra-bar risk checks do not skew the metrics
+            self.metrics.update(snap["equity"])
+        trades: List[Dict] = []
+        if self.broker.n_trades > self.saved_trades:
+            new_trades = self.broker.trades_df(self.saved_trades)
+            self.saved_trades = self.broker.n_trades
+            self.metrics.add_trades(new_trades)
+            trades = new_trades.assign(run_id=self.run_id).to_dict("records")
+        return dict(snap, run_id=self.run_id), trades
+
+
+def accounts_from_config(cfg, default_params: Optional[Dict] = None) -> List[Account]:
+    """Build the ``live.accounts`` of ``cfg``, or one account running ``cfg.strategy`` if none are listed."""
+    if not cfg.live.accounts:
+        params = cfg.strategy.params if default_params is None else default_params
+        return [Account(cfg.strategy.name, cfg.strategy.name, params, cfg.symbols, cfg)]
+    return [
+        Account(a.name, a.strategy, a.params, cfg.symbols, cfg, a.starting_balance_eur) for a in cfg.live.accounts
+    ]
+
+
+class PaperEngine:
+    """Runs every account on one shared feed, scheduled on bar closes.
+
+    A single market data task fetches each closed bar once per symbol and
+    fans it out to all accounts; risk checks share one price snapshot.
+    Each account has its own ``Run`` row. Snapshots and trades go through a
+    :class:`~trader.storage.writer.RowWriter`, so trading never waits on the
+    database.
+    """
+
+    def __init__(
+        self,
+        cfg,
+        accounts: Sequence[Account],
+        feed: Optional[AsyncFeed] = None,
+        poll: Callable[..., pd.DataFrame] = poll_latest_all,
+        scheduler: Optional[BarCloseScheduler] = None,
+        writer: Optional[RowWriter] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.accounts = list(accounts)
+        self.symbols = list(cfg.symbols)
+        self.network = network_kwargs(cfg)
+        self.feed = feed or AsyncFeed(cfg.exchange, concurrency=cfg.network.max_concurrency, **self.network)
+        self.poll = poll
+        live = cfg.live
+        self.scheduler = scheduler or BarCloseScheduler(
+            cfg.timeframe,
+            settle_seconds=live.settle_seconds,
+            retry_seconds=live.retry_seconds,
+            max_wait_seconds=live.max_wait_seconds,
+            risk_check_seconds=live.risk_check_seconds,
+        )
+        self.writer = writer or RowWriter(live.write_batch_size, live.write_flush_seconds)
+        self.tf = pd.Timedelta(seconds=timeframe_to_seconds(cfg.timeframe))
+        self.windows: Dict[str, BarWindow] = {}
+        self.fed_ts: Dict[str, pd.Timestamp] = {}
+        self.prices: Dict[str, float] = {}
+        self._pending_bar: Optional[pd.Timestamp] = None
+        self._done: set = set()
+
+    def start(self, data: Dict[str, pd.DataFrame]) -> None:
+        """Warm up every account on the closed bars of ``data`` and open their runs.
+
+        The last bar of ``data`` may have been cached while still open, so it
+        is left out of the warmup and refetched by :meth:`run`.
+        """
+        now = pd.Timestamp.now(tz="UTC")
+        # strategies only see closed bars; the in-progress one is kept in the window
+        closed = {s: df.iloc[:-1][df.index[:-1] + self.tf <= now] for s, df in data.items()}
+        for account in self.accounts:
+            account.warmup(closed)
+        self.fed_ts = {s: df.index[-1] for s, df in closed.items()}
+        # bounded per-symbol history; the in-progress bar is updated in place
+        self.windows = {s: BarWindow.from_frame(df, self.cfg.data.lookback_limit) for s, df in data.items()}
+        with get_session() as session:
+            for account in self.accounts:
+                run = Run(type=RunType.PAPER, notes=account.name)
+                session.add(run)
+                session.flush()
+                session.add(
+                    StrategyVersion(name=account.strategy_name, params_json=json.dumps(account.params), run_id=run.id)
+                )
+                account.run_id = run.id
+            session.commit()
+        self.writer.start()
+        logger.info("started %s paper accounts on %s symbols", len(self.accounts), len(self.symbols))
+
+    def _mark(self, bar_closed: bool) -> None:
+        ts = pd.Timestamp.utcnow()
+        snapshots, trades = [], []
+        for account in self.accounts:
+            snapshot, new_trades = account.mark(ts, self.prices, bar_closed)
+            snapshots.append(snapshot)
+            trades.extend(new_trades)
+        self.writer.write(AccountSnapshot, snapshots)
+        self.writer.write(Trade, trades)
+        equity = [a.broker.last_snapshot()["equity"] for a in self.accounts]
+        stats = [a.metrics.metrics() for a in self.accounts]
+        sharpe = [m["Sharpe"] for m in stats]
+        logger.info(
+            "Heartbeat accounts=%s equity min=%.2f max=%.2f sharpe min=%.2f max=%.2f worst max_dd=%.2f%%",
+            len(self.accounts),
+            min(equity),
+            max(equity),
+            min(sharpe),
+            max(sharpe),
+            min(m["MaxDrawdown"] for m in stats) * 100,
+        )
+        logger.debug("exchange clients %s", CLIENTS.stats())
+
+    async def _fetch_unfed(self, symbols: Sequence[str], upto: pd.Timestamp) -> Dict[str, object]:
+        """Fetch each symbol's bars from its last fed bar through the one after ``upto``.
+
+        Failed symbols map to their exception.
+        """
+
+        async def fetch(sym: str) -> pd.DataFrame:
+            since = self.fed_ts[sym]
+            limit = min(int((upto - since) / self.tf) + 2, self.cfg.data.page_limit)
+            return await self.feed.fetch_ohlcv(sym, self.cfg.timeframe, limit, since=since.value // 1_000_000)
+
+        frames = await asyncio.gather(*(fetch(s) for s in symbols), return_exceptions=True)
+        return dict(zip(symbols, frames))
+
+    def _ingest(self, sym: str, df: pd.DataFrame) -> None:
+        """Update the window of ``sym`` from ``df`` and feed its closed bars not yet fed, in order."""
+        window = self.windows[sym]
+        for _, bar in df[df.index >= window.last_ts].iterrows():
+            window.push_bar(bar)
+        # every bar but the newest has closed
+        closed = df.iloc[:-1]
+        for ts, bar in closed[closed.index > self.fed_ts[sym]].iterrows():
+            for account in self.accounts:
+                account.on_bar(sym, bar)
+            self.fed_ts[sym] = ts
+
+    async def on_bar(self, bar_ts: pd.Timestamp) -> bool:
+        """Fetch the bar that closed at ``bar_ts`` for every symbol, then let every account trade on it.
+
+        Bars missed since a symbol's last fed bar (e.g. after a skipped bar)
+        are fed first, in order. Symbols whose fetch failed stay pending for
+        the next retry; once the bar is overdue the accounts trade on the
+        symbols that arrived.
+        """
+        if bar_ts != self._pending_bar:
+            self._pending_bar = bar_ts
+            self._done.clear()
+        pending = [s for s in self.symbols if s not in self._done]
+        bars = await self._fetch_unfed(pending, bar_ts)
+        for sym, df in bars.items():
+            if isinstance(df, Exception):
+                logger.warning("bar %s fetch failed for %s: %s", bar_ts, sym, df)
+                continue
+            if df.empty:
+                continue
+            self._ingest(sym, df)
+            if df.index[-1] <= bar_ts:
+                continue  # the exchange has not rolled over yet
+            self.prices[sym] = df["close"].iloc[-1]
+            self._done.add(sym)
+        if len(self._done) < len(self.symbols):
+            missing = sorted(set(self.symbols) - self._done)
+            if not self.scheduler.overdue(bar_ts):
+                logger.debug("bar %s pending for %s", bar_ts, missing)
+                return False
+            # do not let one halted symbol stop trading on the others
+            logger.warning("bar %s missing for %s; trading on the %s that arrived", bar_ts, missing, len(self._done))
+        for account in self.accounts:
+            account.rebalance(self.prices)
+        self._mark(bar_closed=True)
+        return True
+
+    async def on_risk(self) -> None:
+        """Mark every account to market between bar closes from one price snapshot."""
+        quotes = await asyncio.to_thread(
+            self.poll,
+            self.cfg.exchange,
+            self.symbols,
+            self.cfg.timeframe,
+            concurrency=self.cfg.network.max_concurrency,
+            **self.network,
+        )
+        for sym in self.symbols:
+            self.prices[sym] = quotes.at[sym, "price"]
+            if quotes.at[sym, "bar"] == self.windows[sym].last_ts:
+                self.windows[sym].update_price(self.prices[sym])
+        self._mark(bar_closed=False)
+
+    async def run(self, stop: Callable[[], bool] = lambda: False) -> None:
+        """Run until ``stop()`` returns True, then drain pending writes and close the feed."""
+        try:
+            # bring the strategies up to date with the bars closed since the cache was written
+            current = pd.Timestamp(self.scheduler.clock(), unit="s", tz="UTC").floor(self.tf)
+            for sym, df in (await self._fetch_unfed(self.symbols, current)).items():
+                if isinstance(df, Exception):
+                    logger.warning("catch-up fetch failed for %s: %s", sym, df)
+                elif not df.empty:
+                    self._ingest(sym, df)
+            await self.scheduler.arun(self.on_bar, self.on_risk, stop)
+        finally:
+            await asyncio.to_thread(self.writer.close)
+            await self.feed.close()
+
+
+__all__ = ["Account", "PaperEngine", "accounts_from_config"]
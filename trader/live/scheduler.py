@@ -0,0 +1,144 @@
+"""Scheduling of live work on bar closes and at a fixed risk-check cadence."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generator, Optional, Tuple
+
+import pandas as pd
+
+from ..utils import timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class BarCloseScheduler:
+    """Calls ``on_bar`` just after each bar closes and ``on_risk`` in between.
+
+    ``on_bar(bar_ts)`` runs ``settle_seconds`` after the bar starting at
+    ``bar_ts`` closes and returns True once it has the closed bar; until
+    then it is retried every ``retry_seconds``, for at most
+    ``max_wait_seconds`` (see :meth:`overdue`). ``on_risk()`` runs every ``risk_check_seconds`` on
+    a wall-clock grid. Exceptions from either callback are logged, a failed
+    ``on_bar`` counting as not ready. ``clock``, ``sleep`` and ``async_sleep``
+    can be replaced in tests. :meth:`arun` is the asyncio variant.
+    """
+
+    def __init__(
+        self,
+        timeframe: str,
+        settle_seconds: float = 2.0,
+        retry_seconds: float = 2.0,
+        max_wait_seconds: float = 120.0,
+        risk_check_seconds: float = 300.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.tf_seconds = timeframe_to_seconds(timeframe)
+        self.settle_seconds = settle_seconds
+        self.retry_seconds = retry_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.risk_check_seconds = risk_check_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+
+    def next_close(self, now: float) -> float:
+        """Epoch seconds of the first bar boundary after ``now``."""
+        return (now // self.tf_seconds + 1) * self.tf_seconds
+
+    def overdue(self, bar_ts: pd.Timestamp) -> bool:
+        """Whether the bar starting at ``bar_ts`` has waited ``max_wait_seconds`` since its close."""
+        return self.clock() - (bar_ts.timestamp() + self.tf_seconds) >= self.max_wait_seconds
+
+    def _events(self, stop: Callable[[], bool]) -> Generator[Tuple[str, object], Optional[bool], None]:
+        """Yield ``("sleep", seconds)``, ``("bar", bar_ts)`` and ``("risk", None)`` in order.
+
+        The driver answers each ``"bar"`` event with whether the bar was ready.
+        """
+        close = self.next_close(self.clock())
+        bar_due = close + self.settle_seconds
+        risk_due = (self.clock() // self.risk_check_seconds + 1) * self.risk_check_seconds
+        while not stop():
+            wait = min(bar_due, risk_due) - self.clock()
+            if wait > 0:
+                yield "sleep", wait
+            if stop():
+                return
+            if bar_due <= risk_due:
+                bar_ts = pd.Timestamp(close - self.tf_seconds, unit="s", tz="UTC")
+                ready = yield "bar", bar_ts
+                now = self.clock()
+                if ready or now - close >= self.max_wait_seconds:
+                    if not ready:
+                        logger.warning("bar %s still incomplete after %.0fs; skipping", bar_ts, now - close)
+                    close = self.next_close(max(now, close))
+                    bar_due = close + self.settle_seconds
+                else:
+                    bar_due = now + self.retry_seconds
+            else:
+                yield "risk", None
+                risk_due = (self.clock() // self.risk_check_seconds + 1) * self.risk_check_seconds
+
+    def run(
+        self,
+        on_bar: Callable[[pd.Timestamp], bool],
+        on_risk: Callable[[], None],
+        stop: Callable[[], bool] = lambda: False,
+    ) -> None:
+        """Run until ``stop()`` returns True (checked before every call)."""
+        events = self._events(stop)
+        reply = None
+        while True:
+            try:
+                kind, arg = events.send(reply)
+            except StopIteration:
+                return
+            reply = None
+            if kind == "sleep":
+                self.sleep(arg)
+            elif kind == "bar":
+                try:
+                    reply = on_bar(arg)
+                except Exception as exc:
+                    logger.exception("bar %s failed: %s", arg, exc)
+                    reply = False
+            else:
+                try:
+                    on_risk()
+                except Exception as exc:
+                    logger.exception("risk check failed: %s", exc)
+
+    async def arun(
+        self,
+        on_bar: Callable[[pd.Timestamp], Awaitable[bool]],
+        on_risk: Callable[[], Awaitable[None]],
+        stop: Callable[[], bool] = lambda: False,
+    ) -> None:
+        """:meth:`run` for coroutine callbacks, sleeping with ``async_sleep``."""
+        events = self._events(stop)
+        reply = None
+        while True:
+            try:
+                kind, arg = events.send(reply)
+            except StopIteration:
+                return
+            reply = None
+            if kind == "sleep":
+                await self.async_sleep(arg)
+            elif kind == "bar":
+                try:
+                    reply = await on_bar(arg)
+                except Exception as exc:
+                    logger.exception("bar %s failed: %s", arg, exc)
+                    reply = False
+            else:
+                try:
+                    await on_risk()
+                except Exception as exc:
+                    logger.exception("risk check failed: %s", exc)
+
+
+__all__ = ["BarCloseScheduler"]
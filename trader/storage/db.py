@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import Iterator
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
@@ -13,7 +14,8 @@ engine = create_engine(f"sqlite:///{DB_PATH}", future=True, echo=False)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
-def get_session() -> Generator[Session, None, None]:
+@contextmanager
+def get_session() -> Iterator[Session]:
     """Yield a new session."""
     session = SessionLocal()
     try:
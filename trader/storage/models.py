@@ -13,6 +13,7 @@ from sqlalchemy import (
     Integer,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -93,6 +94,37 @@ class StrategyVersion(Base):
     run_id = Column(Integer, ForeignKey("runs.id"))
 
 
+class TrialResult(Base):
+    """Objective of one tuning trial, memoised per data and cost context."""
+
+    __tablename__ = "trial_results"
+    __table_args__ = (UniqueConstraint("context", "params_json"),)
+
+    id = Column(Integer, primary_key=True)
+    context = Column(String, index=True)
+    strategy = Column(String)
+    params_json = Column(String)
+    objective = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class WalkForwardWindow(Base):
+    """Checkpointed result of one walk-forward window."""
+
+    __tablename__ = "walkforward_windows"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String, unique=True, index=True)
+    strategy = Column(String)
+    train_start = Column(DateTime)
+    train_end = Column(DateTime)
+    test_end = Column(DateTime)
+    params_json = Column(String)
+    equity_json = Column(Text)
+    summary_json = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 # create tables
 Base.metadata.create_all(engine)
 
@@ -103,6 +135,8 @@ __all__ = [
     "Trade",
     "Position",
     "StrategyVersion",
+    "TrialResult",
+    "WalkForwardWindow",
     "RunType",
     "TradeSide",
     "Base",
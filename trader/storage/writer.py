@@ -0,0 +1,109 @@
+"""Write-behind persistence of live rows on a background thread."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from .db import get_session
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class RowWriter:
+    """Bulk inserts rows queued by the trading loop from a background thread.
+
+    :meth:`write` only enqueues and never blocks: if SQLite falls so far
+    behind that ``max_pending`` batches are queued, the new batch is dropped
+    and counted. Queued rows are flushed in one transaction, one
+    ``INSERT ... VALUES`` per model, once ``batch_size`` rows are buffered or
+    the oldest buffered row is ``flush_seconds`` old. :meth:`close` drains
+    everything queued before returning.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_seconds: float = 1.0, max_pending: int = 10_000) -> None:
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"rows": 0, "flushes": 0, "dropped": 0, "failed": 0}
+
+    def start(self) -> "RowWriter":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="row-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self, model, rows: List[Dict]) -> None:
+        """Queue ``rows`` (column dicts) for insertion into ``model``'s table."""
+        if not rows:
+            return
+        try:
+            self._queue.put_nowait((model, rows))
+        except queue.Full:
+            self.stats["dropped"] += len(rows)
+            logger.error("write queue full; dropped %s %s rows", len(rows), model.__tablename__)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush everything queued so far and stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("row writer did not drain within %ss", timeout)
+        self._thread = None
+
+    def __enter__(self) -> "RowWriter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _flush(self, pending: Dict[type, List[Dict]]) -> None:
+        n = sum(len(rows) for rows in pending.values())
+        try:
+            with get_session() as session:
+                for model, rows in pending.items():
+                    session.execute(insert(model), rows)
+                session.commit()
+        except Exception as exc:
+            self.stats["failed"] += n
+            logger.exception("failed to persist %s rows: %s", n, exc)
+            return
+        self.stats["rows"] += n
+        self.stats["flushes"] += 1
+
+    def _run(self) -> None:
+        pending: Dict[type, List[Dict]] = {}
+        buffered = 0
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                model, rows = item
+                pending.setdefault(model, []).extend(rows)
+                buffered += len(rows)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if buffered >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._flush(pending)
+                pending, buffered, deadline = {}, 0, None
+        # everything before the stop marker has been collected
+        if pending:
+            self._flush(pending)
+
+
+__all__ = ["RowWriter"]
@@ -2,10 +2,13 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Any, Dict, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from .indicators import uncached
+
 
 class Strategy(ABC):
     """Abstract trading strategy."""
@@ -14,6 +17,59 @@ class Strategy(ABC):
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         """Return Series with 1 for long regime and 0 for flat."""
 
+    def panel_signals(self, panel) -> np.ndarray:
+        """Return a ``(time, symbol)`` array of signals for a ``MarketPanel``.
+
+        Bars a symbol does not have carry 0; missing signals hold the previous value.
+        """
+        out = np.zeros((len(panel), len(panel.symbols)), dtype=np.int64)
+        for j, sym in enumerate(panel.symbols):
+            df = panel.frame(sym)
+            sig = self.generate_signals(df).reindex(df.index).ffill().fillna(0)
+            out[panel.valid[:, j], j] = sig.to_numpy()
+        return out
+
+    def lookback(self) -> Optional[int]:
+        """Bars of history the newest signal depends on, or None if unbounded."""
+        return None
+
+    def stream_signals(self, df: pd.DataFrame, state: Any = None) -> Tuple[pd.Series, Any]:
+        """Return signals for the bars in ``df`` and the state for the next chunk.
+
+        ``state`` is whatever the previous call returned (None for the first
+        chunk). The default keeps the last :meth:`lookback` bars and recomputes
+        over them; strategies with unbounded memory override this. Chunks
+        are seen once, so their indicators bypass the shared cache.
+        """
+        full = df if state is None or state.empty else pd.concat([state, df])
+        with uncached():
+            signals = self.generate_signals(full).iloc[len(full) - len(df):]
+        n = self.lookback()
+        return signals, (full if n is None else full.iloc[len(full) - min(n, len(full)):])
+
+    def warmup(self, df: pd.DataFrame) -> pd.Series:
+        """Prime the incremental state from history and return its signals.
+
+        Afterwards :meth:`on_bar` takes one new bar at a time. The default
+        keeps :meth:`stream_signals` state between bars.
+        """
+        signals, self._stream_state = self.stream_signals(df)
+        return signals
+
+    def on_bar(self, bar: pd.Series) -> int:
+        """Return the signal after appending ``bar``, one OHLCV row named by its timestamp."""
+        signals, self._stream_state = self.stream_signals(bar.to_frame().T, self._stream_state)
+        return int(signals.iloc[-1])
+
+    @classmethod
+    def batch_signals(cls, df: pd.DataFrame, params_list: Sequence[Dict]) -> np.ndarray:
+        """Return a ``(len(df), len(params_list))`` array of signals, one column per parameter set.
+
+        Subclasses override this to share indicator work across parameter sets.
+        """
+        columns = [cls(**params).generate_signals(df).to_numpy() for params in params_list]
+        return np.column_stack(columns).astype(np.int8)
+
     @abstractmethod
     def name(self) -> str:
         """Return strategy name."""
@@ -0,0 +1,121 @@
+"""Memoised indicator computations shared across strategies, trials and windows."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+def fingerprint(data: pd.Series | pd.DataFrame) -> str:
+    """Return a digest of the values and index of ``data``."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(data.to_numpy()).tobytes())
+    index = data.index
+    h.update(np.ascontiguousarray(index.asi8 if hasattr(index, "asi8") else index.to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+class IndicatorCache:
+    """LRU cache of indicator results keyed by (data fingerprint, name, params).
+
+    Memory is bounded by ``max_bytes`` of cached values; the least recently
+    used entries are evicted first. Cached results are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Tuple, Tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, data: pd.Series | pd.DataFrame, name: str, params: Tuple[Hashable, ...], compute: Callable[[], object]
+    ):
+        """Return the cached result for ``(data, name, params)``, calling ``compute`` on a miss."""
+        key = (fingerprint(data), name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()
+        size = int(np.sum(value.memory_usage(index=True, deep=True)))
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.nbytes += size
+                while self.nbytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.nbytes -= evicted
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+        }
+
+
+CACHE = IndicatorCache()
+_local = threading.local()
+
+
+@contextmanager
+def uncached() -> Iterator[None]:
+    """Compute indicators in this thread directly, without reading or filling :data:`CACHE`.
+
+    For one-shot data such as streamed chunks and live bars, whose results
+    would only push reusable entries out of the cache.
+    """
+    _local.depth = getattr(_local, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+
+
+def cached(name: str, func: Callable, data: pd.Series | pd.DataFrame, *params: Hashable):
+    """Return ``func(data, *params)`` through the shared :data:`CACHE`, unless inside :func:`uncached`."""
+    if getattr(_local, "depth", 0):
+        return func(data, *params)
+    return CACHE.get(data, name, params, lambda: func(data, *params))
+
+
+def _rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    return series.rolling(window).mean()
+
+
+def rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    """Cached ``series.rolling(window).mean()``."""
+    return cached("rolling_mean", _rolling_mean, series, window)
+
+
+__all__ = ["CACHE", "DEFAULT_MAX_BYTES", "IndicatorCache", "cached", "fingerprint", "rolling_mean", "uncached"]
@@ -2,10 +2,31 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Any, Dict, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
 from .base import Strategy
+from .indicators import cached
+
+
+def _ewm_step(prev: float, value: float, alpha: float, gap: int = 0) -> float:
+    """Advance ``ewm(alpha=alpha, adjust=False).mean()`` by one value, as pandas does.
+
+    ``gap`` is the number of missing values since ``prev``; each one decays
+    the old weight once more.
+    """
+    if prev != prev:
+        return value
+    if value != value or value == prev:
+        return prev
+    # pandas works from the centre of mass, which can round alpha
+    new_wt = 1.0 / (1.0 + (1 - alpha) / alpha)
+    old_wt = 1.0
+    for _ in range(gap + 1):
+        old_wt *= 1.0 - new_wt
+    return (old_wt * prev + new_wt * value) / (old_wt + new_wt)
 
 
 def rsi(series: pd.Series, period: int) -> pd.Series:
@@ -25,15 +46,80 @@ class RSIReversion(Strategy):
     sell_th: int
 
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
-        r = rsi(df["close"], self.period)
-        regime = pd.Series(0, index=df.index)
+        r = cached("rsi", rsi, df["close"], self.period)
+        regime = pd.Series(np.nan, index=df.index)
         long = r < self.buy_th
         flat = r > self.sell_th
         regime[long] = 1
         regime[flat] = 0
-        regime = regime.replace(to_replace=0, method="ffill").fillna(0)
+        # hold the last long/flat decision while RSI is between the thresholds
+        regime = regime.ffill().fillna(0).astype(int)
         return regime
 
+    def stream_signals(self, df: pd.DataFrame, state: Any = None) -> Tuple[pd.Series, Any]:
+        # The Wilder averages never forget, so carry them instead of a bar window.
+        if state is None:
+            state = {"close": np.nan, "ma_up": np.nan, "ma_down": np.nan, "regime": 0, "gap": 0}
+        if df.empty:
+            return pd.Series(dtype=int), state
+        close = df["close"]
+        delta = close.diff()
+        delta.iloc[0] = close.iloc[0] - state["close"]
+        alpha = 1 / self.period
+        # seeding ewm with the previous average continues its recursion exactly
+        ma_up = pd.concat([pd.Series([state["ma_up"]]), delta.clip(lower=0)], ignore_index=True)
+        ma_up = ma_up.ewm(alpha=alpha, adjust=False).mean().iloc[1:].to_numpy()
+        ma_down = pd.concat([pd.Series([state["ma_down"]]), -delta.clip(upper=0)], ignore_index=True)
+        ma_down = ma_down.ewm(alpha=alpha, adjust=False).mean().iloc[1:].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = pd.Series(100 - (100 / (1 + ma_up / ma_down)), index=df.index)
+        regime = pd.Series(np.nan, index=df.index)
+        regime[r < self.buy_th] = 1
+        regime[r > self.sell_th] = 0
+        regime = regime.ffill().fillna(state["regime"]).astype(int)
+        observed = np.flatnonzero(delta.notna().to_numpy())
+        state = {
+            "close": close.iloc[-1],
+            "ma_up": ma_up[-1],
+            "ma_down": ma_down[-1],
+            "regime": int(regime.iloc[-1]),
+            # missing deltas since the last one seen, for on_bar
+            "gap": len(df) - 1 - observed[-1] if len(observed) else state.get("gap", 0) + len(df),
+        }
+        return regime, state
+
+    def on_bar(self, bar: pd.Series) -> int:
+        state = self._stream_state
+        close = float(bar["close"])
+        delta = close - state["close"]
+        state["close"] = close
+        if delta != delta:
+            state["gap"] += 1
+        else:
+            up = delta if delta >= 0 else 0.0
+            down = -(delta if delta <= 0 else 0.0)
+            alpha = 1 / self.period
+            state["ma_up"] = _ewm_step(state["ma_up"], up, alpha, state["gap"])
+            state["ma_down"] = _ewm_step(state["ma_down"], down, alpha, state["gap"])
+            state["gap"] = 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = 100 - 100 / (1 + np.float64(state["ma_up"]) / state["ma_down"])
+        if r > self.sell_th:
+            state["regime"] = 0
+        elif r < self.buy_th:
+            state["regime"] = 1
+        return state["regime"]
+
+    @classmethod
+    def batch_signals(cls, df: pd.DataFrame, params_list: Sequence[Dict]) -> np.ndarray:
+        strats = [cls(**params) for params in params_list]
+        by_period = {p: cached("rsi", rsi, df["close"], p).to_numpy() for p in {s.period for s in strats}}
+        r = np.column_stack([by_period[s.period] for s in strats])
+        buy_th = np.array([s.buy_th for s in strats])
+        sell_th = np.array([s.sell_th for s in strats])
+        regime = np.where(r > sell_th, 0.0, np.where(r < buy_th, 1.0, np.nan))
+        return pd.DataFrame(regime).ffill().fillna(0).to_numpy().astype(np.int8)
+
     def name(self) -> str:
         return "rsi_reversion"
 
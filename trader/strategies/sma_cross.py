@@ -1,11 +1,74 @@
 """Simple moving average crossover strategy."""
 from __future__ import annotations
 
+import math
+from collections import deque
 from dataclasses import dataclass
+from typing import Dict, Sequence
 
+import numpy as np
 import pandas as pd
 
 from .base import Strategy
+from .indicators import rolling_mean, uncached
+
+
+class _RollingMean:
+    """Rolling mean fed one value at a time.
+
+    Mirrors pandas' ``roll_mean`` (Kahan-compensated add/remove, sign counts
+    and the run-of-equal-values rule) so results equal
+    ``Series.rolling(window).mean()`` bit for bit.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: deque = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.same = 0
+        self.total = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.prev = math.nan
+
+    def update(self, value: float) -> float:
+        if math.isinf(value):
+            value = math.nan
+        if not self.values:
+            self.prev = value
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.comp_remove
+                t = self.total + y
+                self.comp_remove = t - self.total - y
+                self.total = t
+                if math.copysign(1.0, old) < 0:
+                    self.neg_ct -= 1
+        self.values.append(value)
+        if value == value:
+            self.nobs += 1
+            y = value - self.comp_add
+            t = self.total + y
+            self.comp_add = t - self.total - y
+            self.total = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            self.same = self.same + 1 if value == self.prev else 1
+            self.prev = value
+        return self.mean()
+
+    def mean(self) -> float:
+        if self.nobs < self.window or self.nobs == 0:
+            return math.nan
+        if self.same >= self.nobs:
+            return self.prev
+        result = self.total / self.nobs
+        if (self.neg_ct == 0 and result < 0) or (self.neg_ct == self.nobs and result > 0):
+            return 0.0
+        return result
 
 
 @dataclass
@@ -18,11 +81,36 @@ class SMACross(Strategy):
             raise ValueError("fast must be < slow")
 
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
-        sma_fast = df["close"].rolling(self.fast).mean()
-        sma_slow = df["close"].rolling(self.slow).mean()
+        sma_fast = rolling_mean(df["close"], self.fast)
+        sma_slow = rolling_mean(df["close"], self.slow)
         regime = (sma_fast > sma_slow).astype(int)
         return regime
 
+    def lookback(self) -> int:
+        return self.slow
+
+    def warmup(self, df: pd.DataFrame) -> pd.Series:
+        self._fast_mean = _RollingMean(self.fast)
+        self._slow_mean = _RollingMean(self.slow)
+        for close in df["close"].to_numpy(dtype=float):
+            self._fast_mean.update(close)
+            self._slow_mean.update(close)
+        with uncached():
+            return self.generate_signals(df)
+
+    def on_bar(self, bar: pd.Series) -> int:
+        close = float(bar["close"])
+        return int(self._fast_mean.update(close) > self._slow_mean.update(close))
+
+    @classmethod
+    def batch_signals(cls, df: pd.DataFrame, params_list: Sequence[Dict]) -> np.ndarray:
+        strats = [cls(**params) for params in params_list]
+        windows = {w for s in strats for w in (s.fast, s.slow)}
+        sma = {w: rolling_mean(df["close"], w).to_numpy() for w in windows}
+        fast = np.column_stack([sma[s.fast] for s in strats])
+        slow = np.column_stack([sma[s.slow] for s in strats])
+        return (fast > slow).astype(np.int8)
+
     def name(self) -> str:
         return "sma_cross"
 
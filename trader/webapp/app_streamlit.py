@@ -10,12 +10,14 @@ import streamlit as st
 
 from ..config import load_config
 from ..core.backtest import run_backtest
-from ..core.metrics import compute_metrics
-from ..data.feed import fetch_ohlcv
+from ..core.metrics import OnlineMetrics, compute_metrics
+from ..data.feed import fetch_ohlcv, network_kwargs
+from ..data.store import load_market_data
 from ..strategies.sma_cross import SMACross
 from ..strategies.rsi_reversion import RSIReversion
 from ..storage.db import get_session
 from ..storage.models import AccountSnapshot, Run, RunType, Trade
+from ..utils import timeframe_to_seconds
 
 STRATS = {
     "sma_cross": SMACross,
@@ -25,21 +27,10 @@ STRATS = {
 
 cfg = load_config()
 net = cfg.network
-proxies = cfg.proxies.dict(exclude_none=True)
 st.set_page_config(page_title="Trader Dashboard", layout="wide")
 st.title("Paper Trading Dashboard")
 try:
-    fetch_ohlcv(
-        cfg.exchange,
-        cfg.symbols[0],
-        cfg.timeframe,
-        1,
-        timeout_ms=net.timeout_ms,
-        max_retries=net.max_retries,
-        backoff_base_ms=net.backoff_base_ms,
-        user_agent=net.user_agent,
-        proxies=proxies,
-    )
+    fetch_ohlcv(cfg.exchange, cfg.symbols[0], cfg.timeframe, 1, **network_kwargs(cfg))
 except Exception:  # pragma: no cover - network failure
     st.warning(
         "Initial market data fetch failed. Run python scripts/selftest_connection.py or configure proxies/timeouts."
@@ -86,25 +77,30 @@ if not snaps.empty:
     st.subheader("Equity Curve")
     fig = px.line(snaps, x="ts", y="equity")
     st.plotly_chart(fig, use_container_width=True)
+
+    # fold only bars completed since the last rerun into the running metrics
+    live = st.session_state.get("live_metrics")
+    if live is None or live["run_id"] != run.id:
+        live = {"run_id": run.id, "bar": None, "trade_id": 0, "metrics": OnlineMetrics(cfg.timeframe)}
+        st.session_state["live_metrics"] = live
+    # snapshots also come from intra-bar risk checks; metrics are annualised per bar
+    step = pd.Timedelta(seconds=timeframe_to_seconds(cfg.timeframe))
+    bars = snaps.sort_values("ts").set_index("ts")["equity"].resample(step).last().dropna().iloc[:-1]
+    new_bars = bars if live["bar"] is None else bars[bars.index > live["bar"]]
+    if not new_bars.empty:
+        live["metrics"].update_many(new_bars.to_numpy())
+        live["bar"] = new_bars.index[-1]
+    if not trades.empty:
+        live["metrics"].add_trades(trades[trades["id"] > live["trade_id"]].sort_values("id"))
+        live["trade_id"] = max(live["trade_id"], int(trades["id"].max()))
+    st.subheader("Live Metrics")
+    st.write(live["metrics"].metrics())
 else:
     st.info("No live data yet")
 
 if run_bt:
     strat = STRATS[strategy_name](**params)
-    data = {
-        s: fetch_ohlcv(
-            cfg.exchange,
-            s,
-            cfg.timeframe,
-            cfg.data.lookback_limit,
-            timeout_ms=net.timeout_ms,
-            max_retries=net.max_retries,
-            backoff_base_ms=net.backoff_base_ms,
-            user_agent=net.user_agent,
-            proxies=proxies,
-        )
-        for s in symbols
-    }
+    data = load_market_data(cfg, symbols)
     equity_df, trades_df = run_backtest(data, strat, cfg)
     metrics = compute_metrics(equity_df["equity"], trades_df, cfg.timeframe)
     st.subheader("Backtest Metrics")